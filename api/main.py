@@ -1,6 +1,6 @@
 from fastapi import FastAPI, HTTPException, Depends
 from sqlalchemy.orm import Session
-from typing import List, Dict
+from typing import List, Dict, Optional
 import pandas as pd
 from models.database import SessionLocal
 from services.catalog_service import CatalogService
@@ -80,9 +80,42 @@ async def create_brand(brand: BrandCreate):
     return {"message": message}
 
 @app.get("/catalogs/", tags=["Catalogs"])
-async def get_catalogs():
-    """Get all catalog entries"""
-    return CatalogService.get_catalogs()
+async def get_catalogs(limit: int = 100, cursor: Optional[str] = None, order_by: str = "id",
+                       descending: bool = False, fields: Optional[str] = None,
+                       source: Optional[str] = None, status: Optional[str] = None,
+                       updated_since: Optional[datetime] = None):
+    """Get a page of catalog entries; pass next_cursor back as cursor for the next page.
+
+    fields is a comma-separated list of columns (data and description are
+    left out by default).
+    """
+    filters = {key: value for key, value in (('source', source), ('status', status)) if value is not None}
+    try:
+        return CatalogService.list_catalogs(
+            limit=limit,
+            cursor=cursor,
+            order_by=order_by,
+            descending=descending,
+            columns=[field.strip() for field in fields.split(',') if field.strip()] if fields else None,
+            filters=filters,
+            updated_since=updated_since
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/catalogs/search", tags=["Catalogs"])
+async def search_catalogs(q: str, limit: int = 20, offset: int = 0):
+    """Full-text product search, best matches first"""
+    products = CatalogService.search_products(q, limit=min(limit, 100), offset=offset)
+    return [
+        {key: value for key, value in CatalogService._catalog_to_dict(product).items() if key != 'data'}
+        for product in products
+    ]
+
+@app.get("/catalogs/stats", tags=["Catalogs"])
+async def get_catalog_stats(refresh: bool = False):
+    """Get catalog totals and per-category, per-brand and per-source aggregates"""
+    return CatalogService.get_statistics(refresh=refresh)
 
 @app.post("/catalogs/", tags=["Catalogs"])
 async def create_catalog_entry(catalog: CatalogEntry):
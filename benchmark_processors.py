@@ -0,0 +1,51 @@
+"""Compare per-cell and vectorised price/quantity cleaning on a synthetic feed.
+
+Usage: python benchmark_processors.py [rows]
+"""
+import sys
+import time
+import numpy as np
+import pandas as pd
+from utils.processors import clean_price, clean_quantity, clean_price_series, clean_quantity_series
+
+def make_feed(rows: int = 1_000_000, seed: int = 42) -> pd.DataFrame:
+    """Build a supplier-like feed mixing clean, French-formatted and junk values"""
+    rng = np.random.default_rng(seed)
+    amounts = rng.uniform(0, 5000, rows).round(2)
+    price_formats = np.array([
+        '{:.2f}', '{:.2f} €', 'EUR {:.2f}', '{:,.2f}', 'NC', '', 'nan'
+    ], dtype=object)
+    picks = rng.integers(0, len(price_formats), rows)
+    prices = [
+        np.nan if fmt == 'nan' else fmt.format(amount).replace('.', ',', 1) if i % 3 == 0 else fmt.format(amount)
+        for i, (fmt, amount) in enumerate(zip(price_formats[picks], amounts))
+    ]
+    quantities = rng.integers(0, 1000, rows).astype(object)
+    quantities[rng.random(rows) < 0.1] = 'NC'
+    quantities[rng.random(rows) < 0.1] = '12 pcs'
+    quantities[rng.random(rows) < 0.05] = np.nan
+    return pd.DataFrame({'price': prices, 'stock_quantity': quantities})
+
+def timed(func, series: pd.Series):
+    start = time.perf_counter()
+    result = func(series)
+    return result, time.perf_counter() - start
+
+def main(rows: int):
+    df = make_feed(rows)
+    print(f"Synthetic feed: {rows:,} rows")
+
+    for column, per_cell, vectorised in [
+        ('price', clean_price, clean_price_series),
+        ('stock_quantity', clean_quantity, clean_quantity_series)
+    ]:
+        expected, apply_time = timed(lambda s: s.apply(per_cell), df[column])
+        result, vector_time = timed(vectorised, df[column])
+        identical = expected.dtype == result.dtype and np.array_equal(
+            expected.to_numpy().view('int64'), result.to_numpy().view('int64')
+        )
+        print(f"{column:>15}: apply {apply_time:6.2f}s | vectorised {vector_time:6.2f}s | "
+              f"x{apply_time / vector_time:4.1f} | bit-identical: {identical}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
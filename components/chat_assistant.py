@@ -107,11 +107,11 @@ def get_database_context() -> str:
     db_info = {}
     
     # Get product statistics
-    products = CatalogService.get_catalogs()
-    if products:
-        db_info['total_products'] = len(products)
-        db_info['active_products'] = len([p for p in products if p.get('status') == 'active'])
-        db_info['product_categories'] = len(set(p.get('category', '') for p in products))
+    stats = CatalogService.get_statistics()
+    if stats['total_products']:
+        db_info['total_products'] = stats['total_products']
+        db_info['active_products'] = stats['status_active_products']
+        db_info['product_categories'] = stats['categories']
     
     # Format context
     context = f"""
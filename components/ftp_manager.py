@@ -1,5 +1,6 @@
 import streamlit as st
 from services.ftp_service import FTPService
+from services.ftp_connection_pool import ftp_pool
 from services.catalog_service import CatalogService
 from utils.helpers import prepare_catalog_summary
 import pandas as pd
@@ -24,6 +25,12 @@ def save_connections(connections):
     except Exception as e:
         st.error(f"Error saving connections: {str(e)}")
 
+def release_current_connection():
+    """Hand the current session back to the connection pool before switching"""
+    if 'ftp_service' in st.session_state:
+        st.session_state['ftp_service'].disconnect()
+        del st.session_state['ftp_service']
+
 def render_ftp_manager():
     st.header("FTP/SFTP Data Retrieval")
 
@@ -57,12 +64,14 @@ def render_ftp_manager():
                     st.write(f"**Port:** {connection['port']}")
                 with col3:
                     if st.button("Connect", key=f"connect_{idx}"):
+                        release_current_connection()
                         ftp_service = FTPService(
                             connection['host'],
                             connection['username'],
                             connection['password'],
                             connection['port'],
-                            use_sftp=connection.get('use_sftp', False)
+                            use_sftp=connection.get('use_sftp', False),
+                            pool=ftp_pool
                         )
                         success, message = ftp_service.connect()
                         if success:
@@ -104,7 +113,8 @@ def render_ftp_manager():
             if not host:
                 st.error("Host is required")
             else:
-                ftp_service = FTPService(host, username, password, port, use_sftp=use_sftp)
+                release_current_connection()
+                ftp_service = FTPService(host, username, password, port, use_sftp=use_sftp, pool=ftp_pool)
                 success, message = ftp_service.connect()
                 
                 if success:
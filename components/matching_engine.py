@@ -6,8 +6,10 @@ from services.catalog_service import CatalogService
 def render_matching_engine():
     st.header("Product Matching")
     
-    catalogs = CatalogService.get_catalogs()
-    df = pd.DataFrame(catalogs)
+    catalogs = CatalogService.iter_catalogs(columns=[
+        'id', 'article_code', 'name', 'description', 'barcode', 'stock_quantity', 'purchase_price', 'list_price'
+    ])
+    df = pd.DataFrame(list(catalogs))
     
     if not df.empty:
         st.subheader("Match Products")
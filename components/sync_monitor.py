@@ -2,7 +2,7 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 import json
-from models.database import SessionLocal, Catalog
+from services.catalog_service import CatalogService
 
 def render_sync_monitor():
     st.header("Real-time Sync Monitor")
@@ -158,21 +158,15 @@ def render_sync_monitor():
     # Display sync statistics
     st.subheader("Sync Statistics")
     
-    # Get initial sync statistics from database
-    db = SessionLocal()
-    try:
-        stats = {
-            "Last Sync": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
-            "Total Records": db.query(Catalog).count(),
-            "Recent Updates": db.query(Catalog).filter(
-                Catalog.updated_at >= datetime.utcnow()
-            ).count()
-        }
-        
-        # Display metrics
-        col1, col2 = st.columns(2)
-        col1.metric("Total Records", stats["Total Records"])
-        col2.metric("Recent Updates", stats["Recent Updates"])
-        
-    finally:
-        db.close()
+    # Get initial sync statistics (cached, refreshed after imports)
+    catalog_stats = CatalogService.get_statistics()
+    stats = {
+        "Last Sync": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
+        "Total Records": catalog_stats['total_products'],
+        "Recent Updates": catalog_stats['recent_updates']
+    }
+
+    # Display metrics
+    col1, col2 = st.columns(2)
+    col1.metric("Total Records", stats["Total Records"])
+    col2.metric("Recent Updates", stats["Recent Updates"])
@@ -1,8 +1,8 @@
-from models.database import Base, engine
+from models.database import init_db
 
 def init_database():
-    """Initialize database tables"""
-    Base.metadata.create_all(bind=engine)
+    """Initialize database tables and apply pending migrations"""
+    init_db()
 
 if __name__ == "__main__":
     print("Initializing database...")
@@ -1,12 +1,19 @@
 from .database import (
     Base,
     SessionLocal,
+    WriterSessionLocal,
     engine,
+    writer_engine,
     AIConfig,
     AIEnrichmentPrompt,
     AIGenerationLog,
     Catalog,
     Brand,
     Category,
-    ProductEnrichment
+    ProductEnrichment,
+    ValidationRule,
+    ImportHistory,
+    ImportRuleExecution,
+    ArchivedProduct,
+    ImportProfile
 )
@@ -1,9 +1,11 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Text, JSON, Enum, Date
+from sqlalchemy import create_engine, event, Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Text, JSON, Enum, Date, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
 import enum
+import logging
 import os
+import re
 import streamlit as st
 from dotenv import load_dotenv
 
@@ -20,6 +22,47 @@ def get_database_url():
     
     return os.getenv("DATABASE_URL", "sqlite:///./catalog.db")
 
+def get_database_setting(name: str, default=None):
+    """Read a [database] setting from Streamlit secrets, else the NAME environment variable"""
+    if hasattr(st, "secrets"):
+        try:
+            return st.secrets["database"][name]
+        except (KeyError, AttributeError, FileNotFoundError):
+            pass
+
+    return os.getenv(name.upper(), default)
+
+# SQLite performance profile: WAL lets readers run while an import writes,
+# synchronous=NORMAL is durable in WAL mode apart from the last commits on
+# power loss. Each pragma can be overridden with a sqlite_<pragma> setting.
+SQLITE_PRAGMA_DEFAULTS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,  # negative values are KiB: 64 MB per connection
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000  # ms to wait for a lock instead of failing with "database is locked"
+}
+
+def get_sqlite_pragmas():
+    """The SQLite pragmas to apply on every new connection"""
+    pragmas = {}
+    for name, default in SQLITE_PRAGMA_DEFAULTS.items():
+        value = str(get_database_setting(f"sqlite_{name}", default))
+        if not re.fullmatch(r'-?\w+', value):
+            logging.error(f"Ignoring invalid SQLite pragma value {name}={value}")
+            value = str(default)
+        pragmas[name] = value
+    return pragmas
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
+
 # Get database URL
 SQLALCHEMY_DATABASE_URL = get_database_url()
 
@@ -29,10 +72,34 @@ if SQLALCHEMY_DATABASE_URL.startswith("postgres://"):
 
 # Create database engine with proper settings for both SQLite and PostgreSQL
 if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
+    SQLITE_PRAGMAS = get_sqlite_pragmas()
     engine = create_engine(
         SQLALCHEMY_DATABASE_URL, 
         connect_args={"check_same_thread": False}
     )
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+
+    # Import jobs share one writer connection, so they queue in the pool
+    # instead of contending for the database lock. Its transactions start
+    # with BEGIN IMMEDIATE, taking the write lock up front rather than
+    # failing when a read transaction later tries to write.
+    writer_engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=float(get_database_setting("sqlite_writer_timeout", 600))
+    )
+
+    @event.listens_for(writer_engine, "connect")
+    def _connect_writer(dbapi_connection, connection_record):
+        _apply_sqlite_pragmas(dbapi_connection, connection_record)
+        # Let SQLAlchemy emit BEGIN itself instead of the sqlite3 module
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(writer_engine, "begin")
+    def _begin_writer(connection):
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
 else:
     engine = create_engine(
         SQLALCHEMY_DATABASE_URL,
@@ -41,9 +108,11 @@ else:
         pool_timeout=30,
         pool_recycle=1800
     )
+    writer_engine = engine
 
-# Create session factory
+# Create session factories; WriterSessionLocal is for bulk writers such as imports
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+WriterSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=writer_engine)
 
 # Create base class for declarative models
 Base = declarative_base()
@@ -143,6 +212,13 @@ class AIGenerationLog(Base):
 
 class Catalog(Base):
     __tablename__ = "catalogs"
+    __table_args__ = (
+        # Archiving and dashboards filter a source's products by status
+        Index("ix_catalogs_source_status", "source", "status"),
+        # Connector round-trips and import upserts look products up within their source
+        Index("uq_catalogs_source_source_id", "source", "source_id", unique=True),
+        Index("uq_catalogs_source_article_code", "source", "article_code", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
@@ -157,11 +233,12 @@ class Catalog(Base):
     purchase_price = Column(Float, default=0.0)
     list_price = Column(Float, default=0.0)
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     source = Column(String)
     source_id = Column(String)
     data = Column(JSON)
     status = Column(String)
+    content_hash = Column(String(32))  # md5 of the normalised import fields
 
     # Relationships
     brand = relationship("Brand", back_populates="catalogs")
@@ -209,6 +286,91 @@ class ProductEnrichment(Base):
     # Relationships
     catalog = relationship("Catalog", back_populates="enrichments")
 
+class ValidationRule(Base):
+    __tablename__ = "validation_rules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, index=True)
+    description = Column(Text)
+    rule_type = Column(String)  # barcode, ean13, regex, range, required
+    condition = Column(Text)
+    action = Column(String)  # clear, reject, flag
+    priority = Column(Integer, default=0)
+    is_active = Column(Boolean, default=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ImportHistory(Base):
+    __tablename__ = "import_history"
+
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String, index=True)
+    file_name = Column(String)
+    file_date = Column(DateTime)
+    import_date = Column(DateTime, default=datetime.utcnow, index=True)
+    status = Column(String)  # started, completed, failed
+    total_records = Column(Integer, default=0)
+    processed_records = Column(Integer, default=0)
+    error_records = Column(Integer, default=0)
+    error_details = Column(JSON, default={})
+    rules_applied = Column(JSON, default={})
+    import_metadata = Column(JSON, default={})
+
+    # Relationships
+    rule_executions = relationship("ImportRuleExecution", back_populates="import_history")
+
+class ImportRuleExecution(Base):
+    __tablename__ = "import_rule_executions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    import_id = Column(Integer, ForeignKey("import_history.id"))
+    rule_id = Column(Integer, ForeignKey("validation_rules.id"))
+    records_affected = Column(Integer, default=0)
+    execution_details = Column(JSON, default={})
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    import_history = relationship("ImportHistory", back_populates="rule_executions")
+    rule = relationship("ValidationRule")
+
+class ArchivedProduct(Base):
+    __tablename__ = "archived_products"
+
+    id = Column(Integer, primary_key=True, index=True)
+    original_id = Column(Integer, index=True)
+    reference = Column(String)
+    article_code = Column(String, index=True)
+    name = Column(String)
+    barcode = Column(String)
+    description = Column(Text)
+    price = Column(Float)
+    stock_quantity = Column(Integer)
+    purchase_price = Column(Float)
+    last_seen = Column(DateTime)
+    archived_at = Column(DateTime, default=datetime.utcnow, index=True)
+    archive_reason = Column(String)
+    source_data = Column(JSON)
+
+class ImportProfile(Base):
+    __tablename__ = "import_profiles"
+    __table_args__ = (
+        Index("uq_import_profiles_source_file_pattern", "source", "file_pattern", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String, index=True)
+    file_pattern = Column(String, default='')  # file name with dates masked, see ImportProfileService.file_pattern
+    header_signature = Column(String(32))  # md5 of the feed's column names
+    header = Column(JSON, default=[])
+    dialect = Column(JSON)  # CSVDialect.to_dict(), None for Excel feeds
+    dtypes = Column(JSON, default={})
+    column_mapping = Column(JSON, default={})
+    key_column = Column(String)  # feed column mapped to article_code
+    import_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 def init_db():
-    """Initialize the database tables"""
-    Base.metadata.create_all(bind=engine)
+    """Initialize the database and bring its schema up to date (see models.migrations)"""
+    from models.migrations import upgrade
+    upgrade(engine)
@@ -0,0 +1,164 @@
+"""Versioned schema migrations, applied in order by upgrade().
+
+Each migration has a revision id and the revision it follows, like Alembic.
+Applied revisions are recorded in the schema_migrations table, so every
+migration runs once per database. Migrations check the live schema before
+changing it, because a fresh database gets the current model schema from
+the baseline revision.
+"""
+from datetime import datetime
+from typing import Callable, List, Optional
+import logging
+from sqlalchemy import inspect, text, select, insert, update, delete, literal, Table, MetaData, Column, String, DateTime
+from models.database import Base, Catalog, ImportProfile, ArchivedProduct, ProductEnrichment
+
+schema_migrations = Table(
+    "schema_migrations", MetaData(),
+    Column("revision", String, primary_key=True),
+    Column("description", String),
+    Column("applied_at", DateTime)
+)
+
+class Migration:
+    """One schema revision"""
+
+    def __init__(self, revision: str, down_revision: Optional[str], description: str,
+                 upgrade: Callable):
+        self.revision = revision
+        self.down_revision = down_revision
+        self.description = description
+        self.upgrade = upgrade
+
+def _baseline(connection):
+    """Create the tables missing from the database (e.g. import_profiles)"""
+    Base.metadata.create_all(bind=connection)
+
+def _catalog_content_hash(connection):
+    """Add catalogs.content_hash to databases created before change detection"""
+    columns = {column['name'] for column in inspect(connection).get_columns('catalogs')}
+    if 'content_hash' not in columns:
+        connection.execute(text("ALTER TABLE catalogs ADD COLUMN content_hash VARCHAR(32)"))
+
+def _merge_duplicate_products(connection, columns: List[str]) -> int:
+    """Keep the most recently updated product of each duplicated key and archive the others.
+
+    Enrichments of an archived duplicate move to the product that is kept.
+    Returns the number of archived duplicates.
+    """
+    keys = ', '.join(columns)
+    rows = connection.execute(text(
+        f"SELECT catalogs.id, catalogs.updated_at, {', '.join(f'catalogs.{column}' for column in columns)} "
+        f"FROM catalogs JOIN (SELECT {keys} FROM catalogs "
+        f"WHERE {' AND '.join(f'{column} IS NOT NULL' for column in columns)} "
+        f"GROUP BY {keys} HAVING COUNT(*) > 1) AS duplicates "
+        f"ON {' AND '.join(f'catalogs.{column} = duplicates.{column}' for column in columns)}"
+    )).all()
+
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(row[2:]), []).append(row)
+    kept_by_duplicate = {}
+    for group in groups.values():
+        kept = max(group, key=lambda row: (row.updated_at is not None, str(row.updated_at or ''), row.id))
+        kept_by_duplicate.update({row.id: kept.id for row in group if row.id != kept.id})
+    if not kept_by_duplicate:
+        return 0
+
+    duplicate_ids = list(kept_by_duplicate)
+    connection.execute(insert(ArchivedProduct).from_select(
+        ['original_id', 'reference', 'article_code', 'name', 'barcode', 'description', 'price',
+         'stock_quantity', 'purchase_price', 'last_seen', 'archived_at', 'archive_reason', 'source_data'],
+        select(
+            Catalog.id, Catalog.reference, Catalog.article_code, Catalog.name, Catalog.barcode,
+            Catalog.description, Catalog.list_price, Catalog.stock_quantity, Catalog.purchase_price,
+            Catalog.updated_at, literal(datetime.utcnow()), literal(f"duplicate ({keys})"), Catalog.data
+        ).where(Catalog.id.in_(duplicate_ids))
+    ))
+    for duplicate_id, kept_id in kept_by_duplicate.items():
+        connection.execute(
+            update(ProductEnrichment).where(ProductEnrichment.catalog_id == duplicate_id).values(catalog_id=kept_id)
+        )
+    connection.execute(delete(Catalog).where(Catalog.id.in_(duplicate_ids)))
+    logging.warning(f"Archived {len(duplicate_ids)} duplicated ({keys}) products before adding a unique index")
+    return len(duplicate_ids)
+
+def _catalog_indexes(connection):
+    """Add the composite and unique indexes of the catalog hot paths.
+
+    Products duplicating a unique key are merged first: the most recently
+    updated one is kept, the others are moved to archived_products.
+    """
+    existing = {index['name'] for index in inspect(connection).get_indexes('catalogs')}
+    for index in Catalog.__table__.indexes:
+        if index.name in existing:
+            continue
+        if index.unique:
+            _merge_duplicate_products(connection, [column.name for column in index.columns])
+        index.create(connection)
+
+def _full_text_search(connection):
+    """Create the catalog full-text search index (see SearchService)"""
+    from services.search_service import SearchService
+    SearchService.ensure_index(connection)
+
+def _import_profiles_per_file_pattern(connection):
+    """Key import profiles on (source, file_pattern) instead of source alone"""
+    columns = {column['name'] for column in inspect(connection).get_columns('import_profiles')}
+    if 'file_pattern' not in columns:
+        connection.execute(text("ALTER TABLE import_profiles ADD COLUMN file_pattern VARCHAR DEFAULT ''"))
+        connection.execute(text("UPDATE import_profiles SET file_pattern = '' WHERE file_pattern IS NULL"))
+    if 'key_column' not in columns:
+        connection.execute(text("ALTER TABLE import_profiles ADD COLUMN key_column VARCHAR"))
+
+    # The source index was unique; it becomes a plain index next to the (source, file_pattern) one
+    for index in inspect(connection).get_indexes('import_profiles'):
+        if index['name'] == 'ix_import_profiles_source' and index['unique']:
+            connection.execute(text("DROP INDEX ix_import_profiles_source"))
+    existing = {index['name'] for index in inspect(connection).get_indexes('import_profiles')}
+    for index in ImportProfile.__table__.indexes:
+        if index.name not in existing:
+            index.create(connection)
+
+MIGRATIONS: List[Migration] = [
+    Migration("0001", None, "baseline schema", _baseline),
+    Migration("0002", "0001", "catalogs.content_hash", _catalog_content_hash),
+    Migration("0003", "0002", "catalog composite and unique indexes", _catalog_indexes),
+    Migration("0004", "0003", "catalog full-text search", _full_text_search),
+    Migration("0005", "0004", "import profiles per file pattern", _import_profiles_per_file_pattern),
+]
+
+def applied_revisions(bind) -> List[str]:
+    """Revisions already applied to the database"""
+    with bind.connect() as connection:
+        if not inspect(connection).has_table(schema_migrations.name):
+            return []
+        return [row[0] for row in connection.execute(schema_migrations.select().with_only_columns(
+            schema_migrations.c.revision
+        ))]
+
+def pending_migrations(bind) -> List[Migration]:
+    applied = set(applied_revisions(bind))
+    return [migration for migration in MIGRATIONS if migration.revision not in applied]
+
+def upgrade(bind) -> List[str]:
+    """Apply the pending migrations in order, each in its own transaction.
+
+    Returns the applied revisions; a failing migration is rolled back and
+    stops the upgrade, so it runs again next time.
+    """
+    schema_migrations.create(bind, checkfirst=True)
+    applied = []
+    for migration in pending_migrations(bind):
+        try:
+            with bind.begin() as connection:
+                migration.upgrade(connection)
+                connection.execute(schema_migrations.insert().values(
+                    revision=migration.revision,
+                    description=migration.description,
+                    applied_at=datetime.utcnow()
+                ))
+        except Exception as e:
+            logging.error(f"Migration {migration.revision} ({migration.description}) failed: {str(e)}")
+            raise
+        applied.append(migration.revision)
+    return applied
@@ -0,0 +1,251 @@
+from models.database import Catalog
+from sqlalchemy import select, insert, update
+from sqlalchemy.dialects import sqlite, postgresql
+from datetime import datetime
+from typing import Dict, List, Tuple, Optional, Callable
+import hashlib
+import json
+import pandas as pd
+
+class BulkImportService:
+    """Set-based catalog import: a few IN (...) lookups per chunk and
+    dialect-native upserts instead of per-row queries."""
+
+    DEFAULT_CHUNK_SIZE = 500
+
+    # Catalog columns an import is allowed to write
+    IMPORT_COLUMNS = [
+        'name', 'description', 'reference', 'article_code', 'barcode',
+        'stock_quantity', 'purchase_price', 'list_price', 'source_id'
+    ]
+
+    # Feed field names that map onto a differently named Catalog column
+    FIELD_ALIASES = {
+        'price': 'list_price'
+    }
+
+    # Normalised fields covered by Catalog.content_hash
+    HASHED_COLUMNS = IMPORT_COLUMNS + ['source', 'status', 'data']
+
+    @staticmethod
+    def chunked(values: List, chunk_size: int):
+        """Yield successive slices of at most chunk_size items"""
+        for start in range(0, len(values), chunk_size):
+            yield values[start:start + chunk_size]
+
+    @staticmethod
+    def clean_value(value):
+        """Convert pandas/numpy scalars to plain Python values for the DB driver"""
+        if value is None or (pd.api.types.is_scalar(value) and pd.isna(value)):
+            return None
+        if isinstance(value, pd.Timestamp):
+            return value.to_pydatetime()
+        if hasattr(value, 'item'):
+            return value.item()
+        return value
+
+    @staticmethod
+    def dataframe_to_records(df: pd.DataFrame) -> List[Dict]:
+        """Convert a DataFrame into plain dicts with NaN replaced by None"""
+        return [
+            {key: BulkImportService.clean_value(value) for key, value in row.items()}
+            for row in df.to_dict('records')
+        ]
+
+    @staticmethod
+    def to_catalog_record(data: Dict, source: str) -> Dict:
+        """Project a feed row onto Catalog columns, keeping the rest in `data`"""
+        record = {}
+        extra = {}
+        for key, value in data.items():
+            column = BulkImportService.FIELD_ALIASES.get(key, key)
+            if column in BulkImportService.IMPORT_COLUMNS and column not in record:
+                record[column] = value
+            else:
+                extra[key] = value.isoformat() if isinstance(value, datetime) else value
+
+        record['source'] = source
+        record['status'] = 'active'
+        record['data'] = extra
+        return record
+
+    @staticmethod
+    def content_hash(record: Dict) -> str:
+        """Hash the normalised fields of a record to detect content changes"""
+        payload = json.dumps(
+            {column: record.get(column) for column in BulkImportService.HASHED_COLUMNS},
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.md5(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def load_existing_products(db, article_codes: List[str], source: str, columns: List[str] = ('content_hash',),
+                               chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Dict]:
+        """Load the source's existing products by article code with batched IN (...) queries.
+
+        Products are identified by (source, article_code): a product of
+        another source with the same article code is a different product.
+        """
+        existing = {}
+        selected = [Catalog.id, Catalog.article_code] + [
+            getattr(Catalog, column) for column in columns if column not in ('id', 'article_code')
+        ]
+        for chunk in BulkImportService.chunked(article_codes, chunk_size):
+            rows = db.execute(
+                select(*selected)
+                .where(Catalog.source == source, Catalog.article_code.in_(chunk))
+                .order_by(Catalog.id)
+            ).mappings()
+            for row in rows:
+                # Keep the first match, like the row-by-row lookup did
+                existing.setdefault(row['article_code'], dict(row))
+        return existing
+
+    @staticmethod
+    def load_products_by_id(db, ids: List[int], columns: List[str],
+                            chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[int, Dict]:
+        """Load the given columns of products by primary key"""
+        products = {}
+        selected = [Catalog.id] + [getattr(Catalog, column) for column in columns if column != 'id']
+        for chunk in BulkImportService.chunked(ids, chunk_size):
+            for row in db.execute(select(*selected).where(Catalog.id.in_(chunk))).mappings():
+                products[row['id']] = dict(row)
+        return products
+
+    @staticmethod
+    def fold_repeated(records: List[Dict]) -> Tuple[List[Dict], List[int]]:
+        """Fold rows repeating an article code into one record, the last occurrence winning.
+
+        Returns the records in first-occurrence order and the number of feed
+        rows each one stands for, so every row is counted with the outcome of
+        its product's single write.
+        """
+        folded, rows, position = [], [], {}
+        for record in records:
+            article_code = record.get('article_code')
+            if article_code and article_code in position:
+                folded[position[article_code]] = record
+                rows[position[article_code]] += 1
+                continue
+            if article_code:
+                position[article_code] = len(folded)
+            folded.append(record)
+            rows.append(1)
+        return folded, rows
+
+    @staticmethod
+    def classify_records(records: List[Dict], existing: Dict[str, Dict],
+                         barcode_index) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+        """Split records into (inserts, candidate updates, unchanged) in memory.
+
+        Records are expected folded by article code (see fold_repeated).
+        Barcodes already used by another product, or by an earlier row of the
+        import, are cleared using the import's ImportIndex, which records the
+        barcodes kept. A record whose content hash matches the stored one is
+        unchanged; the others carry the product id and still need a column
+        comparison.
+        """
+        inserts, candidates, unchanged = [], [], []
+        for record in records:
+            article_code = record.get('article_code')
+            barcode = record.get('barcode')
+            if barcode:
+                if barcode_index.is_duplicate_barcode(barcode, article_code):
+                    record['barcode'] = ''
+                else:
+                    barcode_index.claim_barcode(barcode, article_code)
+
+            record['content_hash'] = BulkImportService.content_hash(record)
+            current = existing.get(article_code) if article_code else None
+            if current is None:
+                inserts.append(record)
+            elif current.get('content_hash') == record['content_hash']:
+                unchanged.append(record)
+            else:
+                record['id'] = current['id']
+                candidates.append(record)
+
+        return inserts, candidates, unchanged
+
+    @staticmethod
+    def changed_columns(candidates: List[Dict], current: Dict[int, Dict]) -> List[Dict]:
+        """Reduce candidate updates to the id, the new hash and the columns that differ"""
+        changes = []
+        for record in candidates:
+            stored = current.get(record['id'], {})
+            change = {
+                key: value for key, value in record.items()
+                if key not in ('id', 'content_hash') and stored.get(key) != value
+            }
+            change['id'] = record['id']
+            change['content_hash'] = record['content_hash']
+            changes.append(change)
+        return changes
+
+    @staticmethod
+    def insert_records(db, records: List[Dict], chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """Insert new products in executemany batches.
+
+        On SQLite and PostgreSQL a product that appeared meanwhile under the
+        same (source, article_code) key is updated instead, through
+        ON CONFLICT on the uq_catalogs_source_article_code index.
+        """
+        dialect_insert: Optional[Callable] = {
+            'sqlite': sqlite.insert,
+            'postgresql': postgresql.insert
+        }.get(db.get_bind().dialect.name)
+
+        for chunk in BulkImportService.chunked(records, chunk_size):
+            if dialect_insert is None:
+                db.execute(insert(Catalog), chunk)
+                continue
+            stmt = dialect_insert(Catalog.__table__)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Catalog.__table__.c.source, Catalog.__table__.c.article_code],
+                set_={
+                    **{key: stmt.excluded[key] for key in chunk[0] if key not in ('source', 'article_code')},
+                    'updated_at': datetime.utcnow()
+                }
+            )
+            db.execute(stmt, chunk)
+
+    @staticmethod
+    def upsert_records(db, records: List[Dict], chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """Update existing products keyed on their primary key.
+
+        Records are grouped by the columns they carry, so each statement only
+        writes the columns that changed. updated_at is bumped unless the only
+        change is the content hash itself. SQLite and PostgreSQL use
+        INSERT ... ON CONFLICT (id) DO UPDATE; other dialects fall back to an
+        executemany UPDATE by primary key.
+        """
+        if not records:
+            return
+
+        now = datetime.utcnow()
+        dialect = db.get_bind().dialect.name
+        dialect_insert: Optional[Callable] = {
+            'sqlite': sqlite.insert,
+            'postgresql': postgresql.insert
+        }.get(dialect)
+
+        # executemany needs a uniform key set across the batch
+        groups = {}
+        for record in records:
+            groups.setdefault(frozenset(record), []).append(record)
+
+        for keys, group in groups.items():
+            touch = not keys <= {'id', 'content_hash'}
+            for chunk in BulkImportService.chunked(group, chunk_size):
+                rows = [{**record, 'updated_at': now} if touch else record for record in chunk]
+
+                if dialect_insert is not None:
+                    stmt = dialect_insert(Catalog.__table__)
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=[Catalog.__table__.c.id],
+                        set_={key: stmt.excluded[key] for key in rows[0] if key != 'id'}
+                    )
+                    db.execute(stmt, rows)
+                else:
+                    db.execute(update(Catalog), rows)
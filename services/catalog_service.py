@@ -1,7 +1,24 @@
 from models.database import SessionLocal, Catalog
+from services.catalog_stats_service import catalog_stats
+from sqlalchemy import select, and_, or_
 from sqlalchemy.orm import Session
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterable, Iterator
 from datetime import datetime
+import base64
+import json
+
+# Catalog columns a listing may return; data and description are only sent on request
+LISTING_COLUMNS = [
+    'id', 'name', 'description', 'active', 'reference', 'article_code', 'barcode', 'brand_id',
+    'category_id', 'stock_quantity', 'purchase_price', 'list_price', 'created_at', 'updated_at',
+    'source', 'source_id', 'data', 'status'
+]
+DEFAULT_LISTING_COLUMNS = [column for column in LISTING_COLUMNS if column not in ('data', 'description')]
+
+# Orderings supported by keyset pagination, always with id as tie-breaker
+LISTING_ORDERS = ('id', 'updated_at')
+
+MAX_PAGE_SIZE = 1000
 
 class CatalogService:
     @staticmethod
@@ -16,6 +33,140 @@ class CatalogService:
             if not db:
                 db.close()
 
+    @staticmethod
+    def _encode_cursor(row: Dict, order_by: str) -> str:
+        """Opaque cursor pointing after the given row"""
+        position = {'id': row['id']}
+        if order_by == 'updated_at':
+            position['updated_at'] = row['updated_at'].isoformat()
+        return base64.urlsafe_b64encode(json.dumps(position).encode('utf-8')).decode('ascii')
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Dict:
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            if 'updated_at' in position:
+                position['updated_at'] = datetime.fromisoformat(position['updated_at'])
+            return position
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Invalid cursor: {str(e)}")
+
+    @staticmethod
+    def list_catalogs(limit: int = 100, cursor: Optional[str] = None, order_by: str = 'id',
+                      descending: bool = False, columns: Optional[Iterable[str]] = None,
+                      filters: Optional[Dict] = None, updated_since: Optional[datetime] = None,
+                      db: Optional[Session] = None) -> Dict:
+        """Get one page of catalogs with keyset pagination.
+
+        Pages are ordered by id, or by updated_at then id, and continue after
+        the row the cursor points to, so deep pages cost the same as the first
+        one. Only the requested columns are selected (by default all but data
+        and description). filters maps column names to a value or a list of
+        values; updated_since keeps rows updated at or after that time.
+        Rows without updated_at are not listed when ordering by it.
+
+        Returns {'items': [...], 'next_cursor': cursor or None}; raises
+        ValueError for unknown columns, orderings or cursors.
+        """
+        if order_by not in LISTING_ORDERS:
+            raise ValueError(f"Unsupported ordering: {order_by}")
+        columns = list(columns or DEFAULT_LISTING_COLUMNS)
+        unknown = set(columns) - set(LISTING_COLUMNS)
+        unknown |= set(filters or {}) - set(LISTING_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown catalog columns: {', '.join(sorted(unknown))}")
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+
+        # The ordering columns are needed to build the next cursor
+        selected = ['id'] + [column for column in columns if column != 'id']
+        if order_by == 'updated_at' and 'updated_at' not in selected:
+            selected.append('updated_at')
+
+        query = select(*[getattr(Catalog, column) for column in selected])
+        for column, value in (filters or {}).items():
+            attribute = getattr(Catalog, column)
+            if isinstance(value, (list, tuple, set)):
+                query = query.where(attribute.in_(list(value)))
+            elif value is None:
+                query = query.where(attribute.is_(None))
+            else:
+                query = query.where(attribute == value)
+        if updated_since is not None:
+            query = query.where(Catalog.updated_at >= updated_since)
+
+        position = CatalogService._decode_cursor(cursor) if cursor else None
+        if order_by == 'updated_at':
+            query = query.where(Catalog.updated_at.isnot(None))
+            if position:
+                if 'updated_at' not in position:
+                    raise ValueError("Invalid cursor: not an updated_at cursor")
+                if descending:
+                    after, tie = Catalog.updated_at < position['updated_at'], Catalog.id < position['id']
+                else:
+                    after, tie = Catalog.updated_at > position['updated_at'], Catalog.id > position['id']
+                query = query.where(or_(after, and_(Catalog.updated_at == position['updated_at'], tie)))
+            ordering = [Catalog.updated_at, Catalog.id]
+        else:
+            if position:
+                query = query.where(Catalog.id < position['id'] if descending else Catalog.id > position['id'])
+            ordering = [Catalog.id]
+        query = query.order_by(*[column.desc() if descending else column for column in ordering])
+
+        # One extra row tells whether another page follows
+        close_db = db is None
+        if close_db:
+            db = SessionLocal()
+        try:
+            rows = [dict(row) for row in db.execute(query.limit(limit + 1)).mappings()]
+        finally:
+            if close_db:
+                db.close()
+
+        next_cursor = CatalogService._encode_cursor(rows[limit - 1], order_by) if len(rows) > limit else None
+        items = []
+        for row in rows[:limit]:
+            item = {column: row[column] for column in columns}
+            for column in ('created_at', 'updated_at'):
+                if item.get(column) is not None:
+                    item[column] = item[column].isoformat()
+            items.append(item)
+        return {'items': items, 'next_cursor': next_cursor}
+
+    @staticmethod
+    def iter_catalogs(page_size: int = MAX_PAGE_SIZE, **kwargs) -> Iterator[Dict]:
+        """Iterate over every catalog matching the listing arguments, one page at a time"""
+        cursor = None
+        while True:
+            page = CatalogService.list_catalogs(limit=page_size, cursor=cursor, **kwargs)
+            yield from page['items']
+            cursor = page['next_cursor']
+            if not cursor:
+                return
+
+    @staticmethod
+    def search_products(query: str, limit: int = 20, offset: int = 0,
+                        db: Optional[Session] = None) -> List[Catalog]:
+        """Full-text search over name, description, reference, article code and
+        barcode (see SearchService); returns one page of products, best match first"""
+        from services.search_service import SearchService
+
+        close_db = db is None
+        if close_db:
+            db = SessionLocal()
+        try:
+            ranked = SearchService.search(query, limit=limit, offset=offset, db=db)
+            ids = [catalog_id for catalog_id, _ in ranked]
+            products = {product.id: product for product in db.query(Catalog).filter(Catalog.id.in_(ids))} if ids else {}
+            return [products[catalog_id] for catalog_id in ids if catalog_id in products]
+        finally:
+            if close_db:
+                db.close()
+
+    @staticmethod
+    def get_statistics(refresh: bool = False) -> Dict:
+        """Get cached catalog statistics (see CatalogStats)"""
+        return catalog_stats.get_stats(refresh=refresh)
+
     @staticmethod
     def get_catalog(catalog_id: int, db: Optional[Session] = None) -> Optional[Dict]:
         """Get catalog by ID"""
@@ -37,6 +188,7 @@ class CatalogService:
             catalog = Catalog(**data)
             db.add(catalog)
             db.commit()
+            catalog_stats.invalidate()
             db.refresh(catalog)
             return CatalogService._catalog_to_dict(catalog)
         finally:
@@ -55,6 +207,7 @@ class CatalogService:
                     setattr(catalog, key, value)
                 catalog.updated_at = datetime.utcnow()
                 db.commit()
+                catalog_stats.invalidate()
                 db.refresh(catalog)
                 return CatalogService._catalog_to_dict(catalog)
             return None
@@ -72,6 +225,7 @@ class CatalogService:
             if catalog:
                 db.delete(catalog)
                 db.commit()
+                catalog_stats.invalidate()
                 return True
             return False
         finally:
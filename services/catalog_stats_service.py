@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import logging
+import os
+import threading
+import time
+from sqlalchemy import select, func, case
+from sqlalchemy.orm import Session
+from models.database import SessionLocal, Catalog, Category, Brand
+
+class CatalogStats:
+    """Catalog statistics computed with grouped SQL queries and cached.
+
+    Results are kept for ttl seconds; imports and catalog edits in this
+    process invalidate them right away, other processes see changes once
+    their copy expires.
+    """
+
+    def __init__(self, ttl: float = 60, recent_hours: int = 24):
+        self.ttl = ttl
+        self.recent_hours = recent_hours
+        self._lock = threading.Lock()
+        self._stats: Optional[Dict] = None
+        self._computed_at = 0.0
+
+    def _totals(self, db: Session) -> Dict:
+        """Counts, stock and price aggregates of the whole catalog in one query"""
+        recent_since = datetime.utcnow() - timedelta(hours=self.recent_hours)
+        row = db.execute(select(
+            func.count(Catalog.id).label('total_products'),
+            func.sum(case((Catalog.active == True, 1), else_=0)).label('active_products'),
+            func.sum(case((Catalog.status == 'active', 1), else_=0)).label('status_active_products'),
+            func.sum(case((Catalog.stock_quantity > 0, 1), else_=0)).label('in_stock_products'),
+            func.sum(case((Catalog.barcode.isnot(None) & (Catalog.barcode != ''), 1), else_=0)).label('with_barcode'),
+            func.sum(case((Catalog.updated_at >= recent_since, 1), else_=0)).label('recent_updates'),
+            func.coalesce(func.sum(Catalog.stock_quantity), 0).label('total_stock'),
+            func.coalesce(func.sum(Catalog.stock_quantity * Catalog.purchase_price), 0).label('stock_value'),
+            func.min(Catalog.list_price).label('min_list_price'),
+            func.max(Catalog.list_price).label('max_list_price'),
+            func.avg(Catalog.list_price).label('avg_list_price'),
+            func.max(Catalog.updated_at).label('last_update')
+        )).mappings().one()
+
+        totals = {key: value if value is not None else 0 for key, value in row.items()}
+        for key in ('min_list_price', 'max_list_price', 'avg_list_price', 'stock_value'):
+            totals[key] = float(totals[key])
+        totals['last_update'] = row['last_update'].isoformat() if row['last_update'] else None
+        return totals
+
+    @staticmethod
+    def _grouped(db: Session, key_column, label_column=None, join=None) -> List[Dict]:
+        """Product count, stock and average price per value of key_column"""
+        columns = [key_column.label('key')]
+        if label_column is not None:
+            columns.append(label_column.label('name'))
+        query = select(
+            *columns,
+            func.count(Catalog.id).label('products'),
+            func.coalesce(func.sum(Catalog.stock_quantity), 0).label('stock'),
+            func.avg(Catalog.list_price).label('avg_list_price')
+        ).select_from(Catalog)
+        if join is not None:
+            query = query.outerjoin(*join)
+        query = query.group_by(*columns).order_by(func.count(Catalog.id).desc())
+
+        groups = []
+        for row in db.execute(query).mappings():
+            group = dict(row)
+            group['avg_list_price'] = float(group['avg_list_price'] or 0)
+            groups.append(group)
+        return groups
+
+    def compute(self, db: Optional[Session] = None) -> Dict:
+        """Compute the statistics without using the cache"""
+        close_db = db is None
+        if close_db:
+            db = SessionLocal()
+        try:
+            stats = self._totals(db)
+            stats['by_category'] = self._grouped(
+                db, Catalog.category_id, Category.name, (Category, Category.id == Catalog.category_id)
+            )
+            stats['by_brand'] = self._grouped(
+                db, Catalog.brand_id, Brand.name, (Brand, Brand.id == Catalog.brand_id)
+            )
+            stats['by_source'] = self._grouped(db, Catalog.source)
+            stats['categories'] = sum(1 for group in stats['by_category'] if group['key'] is not None)
+            stats['computed_at'] = datetime.utcnow().isoformat()
+            return stats
+        finally:
+            if close_db:
+                db.close()
+
+    def get_stats(self, db: Optional[Session] = None, refresh: bool = False) -> Dict:
+        """Get the catalog statistics, recomputing them when older than the TTL"""
+        with self._lock:
+            if not refresh and self._stats is not None and time.monotonic() - self._computed_at < self.ttl:
+                return self._stats
+            try:
+                self._stats = self.compute(db)
+                self._computed_at = time.monotonic()
+            except Exception as e:
+                logging.error(f"Error computing catalog statistics: {str(e)}")
+                if self._stats is None:
+                    raise
+            return self._stats
+
+    def invalidate(self):
+        """Drop the cached statistics, e.g. after an import"""
+        with self._lock:
+            self._stats = None
+
+# Global instance
+catalog_stats = CatalogStats(ttl=float(os.getenv("CATALOG_STATS_TTL", 60)))
@@ -1,36 +1,95 @@
 import pandas as pd
 import chardet
-from typing import Tuple, Optional
+from functools import lru_cache
+from typing import Tuple, Optional, Iterator, Dict
 import logging
 import os
 from datetime import datetime
 import codecs
+from utils.processors import (
+    iter_csv_chunks, iter_excel_chunks, detect_file_format, sniff_file_dialect, CSVDialect, CSV_CHUNK_SIZE
+)
+
+# Size of each block (head, middle, tail) fed to the encoding detector
+ENCODING_SAMPLE_BLOCK_SIZE = 64 * 1024
+
+# Detector confidence below which candidate encodings are tried on the sample
+ENCODING_CONFIDENCE_THRESHOLD = 0.8
+
+@lru_cache(maxsize=256)
+def _detect_encoding_cached(file_path: str, size: int, mtime: float) -> str:
+    """Detect encoding from head/middle/tail samples; cached per (path, size, mtime).
+
+    Blocks are fed to one incremental chardet detector, which stops
+    sampling once it is sure of the encoding. An 'ascii' result only means
+    the sample had no non-ASCII bytes, so it is widened to utf-8.
+    """
+    sample = []
+    detector = chardet.UniversalDetector()
+
+    with open(file_path, 'rb') as file:
+        offsets = [0]
+        if size > ENCODING_SAMPLE_BLOCK_SIZE:
+            offsets += [
+                max((size - ENCODING_SAMPLE_BLOCK_SIZE) // 2, 1),
+                max(size - ENCODING_SAMPLE_BLOCK_SIZE, 1)
+            ]
+
+        for offset in offsets:
+            file.seek(offset)
+            if offset:
+                # Realign on a line boundary so no multibyte char is cut in half
+                file.readline()
+            block = file.read(ENCODING_SAMPLE_BLOCK_SIZE)
+            sample.append(block)
+            # The detector keeps its state, so each block is analysed once
+            detector.feed(block)
+            if detector.done:
+                break
+
+    detector.close()
+    result = detector.result
+
+    if (result['encoding'] or '').lower() == 'ascii':
+        return 'utf-8'
+
+    # If confidence is low or encoding is None, try specific encodings on the sample
+    if not result['encoding'] or result['confidence'] < ENCODING_CONFIDENCE_THRESHOLD:
+        encodings_to_try = ['iso-8859-1', 'cp1252', 'latin1', 'utf-8', 'utf-8-sig']
+        for encoding in encodings_to_try:
+            try:
+                for block in sample:
+                    codecs.getincrementaldecoder(encoding)().decode(block, final=False)
+                return encoding
+            except UnicodeDecodeError:
+                continue
+
+        # If no encoding works, default to iso-8859-1 (common for French)
+        return 'iso-8859-1'
+
+    return result['encoding']
+
+# Character normalisation applied to imported text, compiled once
+TEXT_TRANSLATION_TABLE = str.maketrans({
+    '\u2019': "'",  # Smart quote
+    '\u2018': "'",  # Smart quote
+    '\u201c': '"',  # Smart quote
+    '\u201d': '"',  # Smart quote
+    '\xa0': ' ',    # Non-breaking space
+    '\r': '\n',     # Mac newline
+})
 
 class FileHandlingService:
     @staticmethod
     def detect_file_encoding(file_path: str) -> str:
-        """Detect the encoding of a file with high confidence"""
+        """Detect the encoding of a file from a bounded sample.
+
+        Results are cached by (path, size, mtime), so repeated metadata and
+        read calls on an unchanged file skip detection entirely.
+        """
         try:
-            # Read a larger chunk of the file for better detection
-            with open(file_path, 'rb') as file:
-                raw_data = file.read()
-                result = chardet.detect(raw_data)
-                
-                # If confidence is low or encoding is None, try specific encodings
-                if not result['encoding'] or result['confidence'] < 0.8:
-                    # Try to decode with common French encodings
-                    encodings_to_try = ['iso-8859-1', 'cp1252', 'latin1', 'utf-8', 'utf-8-sig']
-                    for encoding in encodings_to_try:
-                        try:
-                            raw_data.decode(encoding)
-                            return encoding
-                        except UnicodeDecodeError:
-                            continue
-                    
-                    # If no encoding works, default to iso-8859-1 (common for French)
-                    return 'iso-8859-1'
-                
-                return result['encoding']
+            stat = os.stat(file_path)
+            return _detect_encoding_cached(os.path.abspath(file_path), stat.st_size, stat.st_mtime)
         except Exception as e:
             logging.error(f"Error detecting file encoding: {str(e)}")
             return 'iso-8859-1'  # Default to ISO-8859-1 for French text
@@ -39,60 +98,66 @@ class FileHandlingService:
     def read_file_with_encoding(file_path: str, encoding: Optional[str] = None) -> Tuple[pd.DataFrame, str]:
         """Read file with proper encoding detection and handling"""
         try:
-            # For Excel files
-            if file_path.endswith(('.xlsx', '.xls')):
+            # For Excel files, recognised by their signature rather than the extension
+            if detect_file_format(file_path) != 'csv':
                 try:
-                    df = pd.read_excel(file_path)
+                    chunks = list(iter_excel_chunks(file_path))
+                    df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
                     return df, 'utf-8'
                 except Exception as e:
                     logging.error(f"Error reading Excel file: {str(e)}")
                     raise
 
-            # For CSV files
-            if not encoding:
-                encoding = FileHandlingService.detect_file_encoding(file_path)
-
-            # Try reading with detected encoding
-            try:
-                # First try with the detected encoding
-                with codecs.open(file_path, 'r', encoding=encoding, errors='replace') as f:
-                    # Read first few lines to check encoding
-                    f.readline()
-                
-                # If successful, read with pandas
-                df = pd.read_csv(file_path, encoding=encoding, encoding_errors='replace')
-                df = FileHandlingService.clean_dataframe(df)
-                return df, encoding
-            
-            except UnicodeDecodeError:
-                # If that fails, try other common encodings
-                encodings_to_try = [
-                    'iso-8859-1',
-                    'cp1252',
-                    'latin1',
-                    'utf-8',
-                    'utf-8-sig',
-                    'mac_roman'
-                ]
-                
-                for enc in encodings_to_try:
-                    if enc != encoding:  # Skip already tried encoding
-                        try:
-                            df = pd.read_csv(file_path, encoding=enc, encoding_errors='replace')
-                            df = FileHandlingService.clean_dataframe(df)
-                            return df, enc
-                        except UnicodeDecodeError:
-                            continue
-                        except Exception as e:
-                            logging.error(f"Error reading file with encoding {enc}: {str(e)}")
-                            continue
-
-            raise ValueError(f"Could not read file with any supported encoding")
+            # For CSV files: one parse with the dialect sniffed from the first block
+            dialect = FileHandlingService.detect_csv_dialect(file_path)
+            if encoding:
+                dialect.encoding = encoding
+            df = pd.read_csv(file_path, encoding_errors='replace', **dialect.read_csv_kwargs())
+            df = FileHandlingService.clean_dataframe(df)
+            return df, dialect.encoding
 
         except Exception as e:
             logging.error(f"Error processing file {file_path}: {str(e)}")
             raise
 
+    @staticmethod
+    def detect_csv_dialect(file_path: str) -> CSVDialect:
+        """Detect the CSV dialect of a file, trying its detected encoding first"""
+        encoding = FileHandlingService.detect_file_encoding(file_path)
+        return sniff_file_dialect(file_path, [encoding, 'utf-8', 'latin-1', 'cp1252'])
+
+    @staticmethod
+    def read_file_chunks(file_path: str, encoding: Optional[str] = None,
+                         chunk_size: int = CSV_CHUNK_SIZE,
+                         dialect: Optional[CSVDialect] = None,
+                         dtype: Optional[Dict[str, str]] = None) -> Iterator[pd.DataFrame]:
+        """Read a file as a stream of cleaned DataFrame chunks.
+
+        CSV files are parsed once with the given dialect, or with one
+        detected from the first block, and the given read_csv dtypes.
+        """
+        try:
+            if detect_file_format(file_path) != 'csv':
+                for chunk in iter_excel_chunks(file_path, chunk_size=chunk_size):
+                    yield FileHandlingService.clean_dataframe(chunk)
+                return
+
+            if dialect is None:
+                dialect = FileHandlingService.detect_csv_dialect(file_path)
+
+            for chunk in iter_csv_chunks(file_path, chunk_size=chunk_size, encoding=encoding,
+                                         dialect=dialect, dtype=dtype):
+                yield FileHandlingService.clean_dataframe(chunk)
+
+        except Exception as e:
+            logging.error(f"Error streaming file {file_path}: {str(e)}")
+            raise
+
+    @staticmethod
+    def clean_column_name(column) -> str:
+        """Normalise a column name: cleaned text, lower case, underscores for spaces"""
+        return FileHandlingService.clean_text_data(str(column)).strip().lower().replace(' ', '_')
+
     @staticmethod
     def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
         """Clean and normalize dataframe content"""
@@ -103,15 +168,25 @@ class FileHandlingService:
         df = df.dropna(how='all')
         
         # Clean column names
-        df.columns = [FileHandlingService.clean_text_data(str(col)).strip().lower().replace(' ', '_') 
-                     for col in df.columns]
+        df.columns = [FileHandlingService.clean_column_name(col) for col in df.columns]
         
-        # Clean text data in all string columns
-        for column in df.select_dtypes(include=['object']).columns:
-            df[column] = df[column].apply(lambda x: FileHandlingService.clean_text_data(str(x)) if pd.notna(x) else x)
+        # Clean text data in all string columns, one vectorised pass per column
+        for column in df.select_dtypes(include=['object', 'string']).columns:
+            present = df[column].notna()
+            df.loc[present, column] = FileHandlingService.clean_text_series(df.loc[present, column].astype(str))
         
         return df
 
+    @staticmethod
+    def clean_text_series(series: pd.Series) -> pd.Series:
+        """Vectorised clean_text_data for a column of strings"""
+        return (
+            series.str.replace('\r\n', '\n', regex=False)
+            .str.translate(TEXT_TRANSLATION_TABLE)
+            .str.removeprefix('\ufeff')
+            .str.strip()
+        )
+
     @staticmethod
     def clean_text_data(text: str) -> str:
         """Clean and normalize text data"""
@@ -119,36 +194,8 @@ class FileHandlingService:
             return str(text)
 
         try:
-            # Handle common French characters
-            replacements = {
-                b'\xe9'.decode('iso-8859-1'): 'é',
-                b'\xe8'.decode('iso-8859-1'): 'è',
-                b'\xea'.decode('iso-8859-1'): 'ê',
-                b'\xe0'.decode('iso-8859-1'): 'à',
-                b'\xe2'.decode('iso-8859-1'): 'â',
-                b'\xf4'.decode('iso-8859-1'): 'ô',
-                b'\xfb'.decode('iso-8859-1'): 'û',
-                b'\xe7'.decode('iso-8859-1'): 'ç',
-                b'\xc9'.decode('iso-8859-1'): 'É',
-                b'\xc8'.decode('iso-8859-1'): 'È',
-                b'\xca'.decode('iso-8859-1'): 'Ê',
-                b'\xc0'.decode('iso-8859-1'): 'À',
-                b'\xc2'.decode('iso-8859-1'): 'Â',
-                b'\xd4'.decode('iso-8859-1'): 'Ô',
-                b'\xdb'.decode('iso-8859-1'): 'Û',
-                b'\xc7'.decode('iso-8859-1'): 'Ç',
-                '\u2019': "'",  # Smart quote
-                '\u2018': "'",  # Smart quote
-                '\u201c': '"',  # Smart quote
-                '\u201d': '"',  # Smart quote
-                '\xa0': ' ',    # Non-breaking space
-                '\r\n': '\n',   # Windows newline
-                '\r': '\n',     # Mac newline
-            }
-            
-            # Apply replacements
-            for old, new in replacements.items():
-                text = text.replace(old, new)
+            # Windows newlines first, so '\r\n' does not become two newlines
+            text = text.replace('\r\n', '\n').translate(TEXT_TRANSLATION_TABLE)
 
             # Remove BOM if present
             if text.startswith('\ufeff'):
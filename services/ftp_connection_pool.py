@@ -0,0 +1,282 @@
+import ftplib
+import logging
+import os
+import threading
+import time
+import paramiko
+from typing import Dict, List, Optional, Set, Tuple
+
+PoolKey = Tuple[str, int, str, str]  # host, port, username, protocol
+
+class PooledConnection:
+    """An authenticated FTP or SFTP session owned by a FTPConnectionPool"""
+
+    def __init__(self, key: PoolKey, connection, sftp=None, home: Optional[str] = None):
+        self.key = key
+        self.connection = connection
+        self.sftp = sftp
+        self.home = home
+        self.last_used = time.monotonic()
+        self.leased_at: Optional[float] = None
+
+    @property
+    def host(self) -> str:
+        return self.key[0]
+
+    @property
+    def use_sftp(self) -> bool:
+        return self.key[3] == 'sftp'
+
+class FTPConnectionPool:
+    """Keyed pool of FTP/SFTP sessions, reused across FTPService instances.
+
+    Sessions are keyed on (host, port, username, protocol), health-checked
+    before reuse, kept alive while idle, evicted after idle_timeout seconds
+    and capped at max_per_host open sessions per host. When a host is at
+    its cap, sessions leased for more than lease_timeout seconds are
+    considered abandoned (e.g. by a closed browser tab) and reclaimed.
+    """
+
+    def __init__(self, max_per_host: int = 4, idle_timeout: float = 300, keepalive_interval: float = 60,
+                 acquire_timeout: float = 30, lease_timeout: float = 1800):
+        self.max_per_host = max_per_host
+        self.idle_timeout = idle_timeout
+        self.keepalive_interval = keepalive_interval
+        self.acquire_timeout = acquire_timeout
+        self.lease_timeout = lease_timeout
+        self._idle: Dict[PoolKey, List[PooledConnection]] = {}
+        self._leased: Set[PooledConnection] = set()
+        self._open_per_host: Dict[str, int] = {}
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._keepalive_thread = None
+
+    @staticmethod
+    def make_key(host: str, port: int, username: str, use_sftp: bool) -> PoolKey:
+        return (host, int(port), username, 'sftp' if use_sftp else 'ftp')
+
+    def _open(self, key: PoolKey, password: str) -> PooledConnection:
+        """Open and authenticate a new session"""
+        host, port, username, protocol = key
+        if protocol == 'sftp':
+            transport = paramiko.Transport((host, port))
+            transport.connect(username=username, password=password)
+            transport.set_keepalive(int(self.keepalive_interval))
+            sftp = paramiko.SFTPClient.from_transport(transport)
+            return PooledConnection(key, transport, sftp)
+
+        connection = ftplib.FTP()
+        connection.connect(host, port)
+        connection.login(username, password)
+        return PooledConnection(key, connection, home=connection.pwd())
+
+    @staticmethod
+    def _close(pooled: PooledConnection):
+        """Close a session, ignoring errors from already dead connections"""
+        try:
+            if pooled.sftp:
+                pooled.sftp.close()
+            if pooled.use_sftp:
+                pooled.connection.close()
+            else:
+                pooled.connection.quit()
+        except Exception:
+            try:
+                pooled.connection.close()
+            except Exception:
+                pass
+
+    @staticmethod
+    def _is_healthy(pooled: PooledConnection) -> bool:
+        """Check a session is alive and reset it to its initial directory"""
+        try:
+            if pooled.use_sftp:
+                if not pooled.connection.is_active():
+                    return False
+                pooled.sftp.chdir(None)
+                pooled.sftp.normalize('.')
+            else:
+                pooled.connection.cwd(pooled.home)
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, pooled: PooledConnection):
+        """Close a session and free its slot for the host"""
+        self._close(pooled)
+        with self._condition:
+            self._open_per_host[pooled.host] = max(self._open_per_host.get(pooled.host, 1) - 1, 0)
+            self._condition.notify_all()
+
+    def _take_idle_for_host(self, host: str) -> Optional[PooledConnection]:
+        """Pop the oldest idle session of another key on the same host (lock held)"""
+        candidates = [
+            (pooled.last_used, key) for key, idle in self._idle.items()
+            for pooled in idle[:1] if key[0] == host
+        ]
+        if not candidates:
+            return None
+        _, key = min(candidates)
+        return self._idle[key].pop(0)
+
+    def _take_expired_lease(self, host: str) -> Optional[PooledConnection]:
+        """Pop the oldest session of the host leased for more than lease_timeout (lock held)"""
+        expired = [
+            pooled for pooled in self._leased
+            if pooled.host == host and time.monotonic() - pooled.leased_at > self.lease_timeout
+        ]
+        if not expired:
+            return None
+        pooled = min(expired, key=lambda pooled: pooled.leased_at)
+        self._leased.discard(pooled)
+        logging.warning(f"Reclaiming FTP session to {host} leased for more than {self.lease_timeout}s")
+        return pooled
+
+    def _lease(self, pooled: PooledConnection) -> PooledConnection:
+        with self._condition:
+            pooled.leased_at = time.monotonic()
+            self._leased.add(pooled)
+        return pooled
+
+    def acquire(self, host: str, port: int, username: str, password: str,
+                use_sftp: bool = False, timeout: Optional[float] = None) -> PooledConnection:
+        """Get a healthy session for the key, reusing an idle one when possible.
+
+        Waits up to timeout seconds (acquire_timeout by default) for a free
+        slot when the host is at its cap, then raises TimeoutError.
+        """
+        self._start_keepalive()
+        key = self.make_key(host, port, username, use_sftp)
+        deadline = time.monotonic() + (self.acquire_timeout if timeout is None else timeout)
+
+        while True:
+            pooled, to_evict = None, None
+            with self._condition:
+                idle = self._idle.get(key)
+                if idle:
+                    pooled = idle.pop()
+                elif self._open_per_host.get(host, 0) < self.max_per_host:
+                    self._open_per_host[host] = self._open_per_host.get(host, 0) + 1
+                else:
+                    # Make room by closing an idle session of another user on this host,
+                    # else an abandoned one
+                    to_evict = self._take_idle_for_host(host) or self._take_expired_lease(host)
+                    if to_evict is None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise TimeoutError(f"No free connection to {host} (limit {self.max_per_host})")
+                        self._condition.wait(remaining)
+                        continue
+
+            if to_evict is not None:
+                self._discard(to_evict)
+                continue
+
+            if pooled is not None:
+                if self._is_healthy(pooled):
+                    return self._lease(pooled)
+                self._discard(pooled)
+                continue
+
+            try:
+                return self._lease(self._open(key, password))
+            except Exception:
+                with self._condition:
+                    self._open_per_host[host] -= 1
+                    self._condition.notify_all()
+                raise
+
+    def try_acquire(self, host: str, port: int, username: str, password: str,
+                    use_sftp: bool = False) -> Optional[PooledConnection]:
+        """Get a session for the key without waiting, None when the host is at its cap"""
+        try:
+            return self.acquire(host, port, username, password, use_sftp, timeout=0)
+        except TimeoutError:
+            return None
+
+    def release(self, pooled: PooledConnection, discard: bool = False):
+        """Return a session to the pool, or close it when discard is set.
+
+        Sessions already released, or reclaimed after lease_timeout, are ignored.
+        """
+        with self._condition:
+            if pooled not in self._leased:
+                return
+            self._leased.discard(pooled)
+        if discard or self._stop.is_set():
+            self._discard(pooled)
+            return
+        pooled.last_used = time.monotonic()
+        with self._condition:
+            self._idle.setdefault(pooled.key, []).append(pooled)
+            self._condition.notify_all()
+
+    def _take_all_idle(self) -> List[PooledConnection]:
+        with self._condition:
+            idle = [pooled for sessions in self._idle.values() for pooled in sessions]
+            self._idle = {}
+        return idle
+
+    def maintain(self):
+        """Evict sessions idle for too long and keep the others alive"""
+        now = time.monotonic()
+        for pooled in self._take_all_idle():
+            if now - pooled.last_used > self.idle_timeout:
+                self._discard(pooled)
+                continue
+            try:
+                if pooled.use_sftp:
+                    alive = pooled.connection.is_active()
+                else:
+                    pooled.connection.voidcmd('NOOP')
+                    alive = True
+            except Exception:
+                alive = False
+
+            if alive:
+                with self._condition:
+                    self._idle.setdefault(pooled.key, []).append(pooled)
+                    self._condition.notify_all()
+            else:
+                self._discard(pooled)
+
+    def _start_keepalive(self):
+        """Start the background maintenance thread on first use"""
+        if self._keepalive_thread is not None:
+            return
+        with self._condition:
+            if self._keepalive_thread is None:
+                self._keepalive_thread = threading.Thread(
+                    target=self._keepalive_loop, name="ftp-pool-keepalive", daemon=True
+                )
+                self._keepalive_thread.start()
+
+    def _keepalive_loop(self):
+        while not self._stop.wait(self.keepalive_interval):
+            try:
+                self.maintain()
+            except Exception as e:
+                logging.error(f"FTP pool maintenance error: {str(e)}")
+
+    def close_all(self):
+        """Close every idle session and stop pooling"""
+        self._stop.set()
+        for pooled in self._take_all_idle():
+            self._discard(pooled)
+
+    def get_stats(self) -> Dict:
+        """Get open and idle session counts"""
+        with self._condition:
+            return {
+                'open_per_host': dict(self._open_per_host),
+                'idle': sum(len(sessions) for sessions in self._idle.values()),
+                'leased': len(self._leased)
+            }
+
+# Global instance
+ftp_pool = FTPConnectionPool(
+    max_per_host=int(os.getenv("FTP_POOL_MAX_PER_HOST", 4)),
+    idle_timeout=float(os.getenv("FTP_POOL_IDLE_TIMEOUT", 300)),
+    keepalive_interval=float(os.getenv("FTP_POOL_KEEPALIVE", 60)),
+    lease_timeout=float(os.getenv("FTP_POOL_LEASE_TIMEOUT", 1800))
+)
@@ -2,24 +2,81 @@ import ftplib
 import paramiko
 import pandas as pd
 from io import StringIO, BytesIO
+import io
 import os
-from typing import Tuple, List
+import posixpath
+import stat
+import tempfile
+import hashlib
+import json
+import logging
+import socket
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple, List, Optional, Iterator, Dict
 from datetime import datetime
+from services.ftp_connection_pool import FTPConnectionPool, PooledConnection
+from services.remote_manifest_service import RemoteManifest, remote_manifest
+from utils.processors import iter_csv_chunks, iter_excel_chunks, detect_file_format, CSV_CHUNK_SIZE
+
+EXCEL_EXTENSIONS = ['.xlsx', '.xls']
+
+# Bytes requested per readv call of a segment; bounds what paramiko buffers ahead of disk writes
+SEGMENT_WINDOW_SIZE = 8 * 1024 * 1024
+SEGMENT_BLOCK_SIZE = 32 * 1024
+# Files smaller than this are not worth splitting into segments
+MIN_SEGMENT_SIZE = 4 * 1024 * 1024
+
+# Partial downloads and transfer checkpoints, kept until a transfer completes
+TRANSFER_CHECKPOINT_DIR = os.getenv("TRANSFER_CHECKPOINT_DIR", "transfer_checkpoints")
+TRANSFER_BLOCK_SIZE = 64 * 1024
+# Errors from dropped or stalled connections, after which a transfer is resumed on a new
+# session. Other OSErrors (local disk full, permission denied) are not retried.
+RETRYABLE_ERRORS = (
+    ConnectionError, socket.timeout, TimeoutError, EOFError,
+    ftplib.error_temp, paramiko.SSHException
+)
+
+class _HashingStream(io.RawIOBase):
+    """Forward-only stream feeding every byte read through a hashlib object"""
+
+    def __init__(self, stream, hasher):
+        self.stream = stream
+        self.hasher = hasher
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self.stream.read(len(buffer))
+        buffer[:len(data)] = data
+        self.hasher.update(data)
+        return len(data)
 
 class FTPService:
-    def __init__(self, host: str, username: str = None, password: str = None, port: int = 21, use_sftp: bool = False):
+    def __init__(self, host: str, username: str = None, password: str = None, port: int = 21, use_sftp: bool = False,
+                 pool: Optional[FTPConnectionPool] = None):
         self.host = host
         self.username = username or 'anonymous'
         self.password = password or 'anonymous@'
         self.port = port
         self.use_sftp = use_sftp
+        self.pool = pool
         self.connection = None
         self.sftp = None
+        self.pooled: Optional[PooledConnection] = None
+        self._lease: Optional[weakref.finalize] = None
 
     def connect(self) -> Tuple[bool, str]:
-        """Connect to FTP/SFTP server"""
+        """Connect to FTP/SFTP server, reusing a pooled session when a pool is set"""
         try:
-            if self.use_sftp:
+            if self.pool is not None:
+                self.pooled = self.pool.acquire(self.host, self.port, self.username, self.password, self.use_sftp)
+                # Hand the session back if this service is dropped without disconnect()
+                self._lease = weakref.finalize(self, self.pool.release, self.pooled)
+                self.connection = self.pooled.connection
+                self.sftp = self.pooled.sftp
+            elif self.use_sftp:
                 # SFTP connection
                 transport = paramiko.Transport((self.host, self.port))
                 transport.connect(username=self.username, password=self.password)
@@ -35,9 +92,11 @@ class FTPService:
             return False, f"Connection failed: {str(e)}"
 
     def disconnect(self):
-        """Disconnect from server"""
+        """Disconnect from server, handing a pooled session back to its pool"""
         try:
-            if self.use_sftp:
+            if self.pooled is not None:
+                self._lease()
+            elif self.use_sftp:
                 if self.sftp:
                     self.sftp.close()
                 if self.connection:
@@ -50,6 +109,8 @@ class FTPService:
         finally:
             self.connection = None
             self.sftp = None
+            self.pooled = None
+            self._lease = None
 
     def list_files(self) -> Tuple[bool, List[str], str]:
         """List files in current directory"""
@@ -62,55 +123,479 @@ class FTPService:
         except Exception as e:
             return False, [], f"Error listing files: {str(e)}"
 
-    def download_file(self, filename: str) -> Tuple[bool, pd.DataFrame, str]:
-        """Download and parse file"""
+    def remote_key(self, filename: str, directory: Optional[str] = None) -> str:
+        """Get a key identifying a file in the current (or given) directory across sessions"""
+        if directory is None:
+            _, directory, _ = self.get_current_directory()
+        path = posixpath.join(directory or '/', filename)
+        protocol = 'sftp' if self.use_sftp else 'ftp'
+        return f"{protocol}://{self.username}@{self.host}:{self.port}{path}"
+
+    @staticmethod
+    def get_file_date(info: Dict) -> datetime:
+        """Get the modification date from list_file_info metadata"""
+        mtime = info.get('mtime')
+        if isinstance(mtime, (int, float)):
+            return datetime.utcfromtimestamp(mtime)
+        if mtime:
+            return datetime.strptime(str(mtime)[:14], '%Y%m%d%H%M%S')
+        return datetime.utcnow()
+
+    def _ftp_file_info(self, filename: str) -> Optional[Dict]:
+        """Get size and modification time with SIZE/MDTM, None for directories"""
         try:
-            # Create a buffer to store file content
-            buffer = BytesIO()
+            size = self.connection.size(filename)
+        except ftplib.error_perm:
+            return None
+        try:
+            mtime = self.connection.voidcmd(f'MDTM {filename}').split()[-1]
+        except ftplib.error_perm:
+            mtime = None
+        return {'size': size, 'mtime': mtime}
 
+    def list_file_info(self) -> Tuple[bool, Dict[str, Dict], str]:
+        """List files in current directory with their size and modification time"""
+        try:
+            files = {}
+            if self.use_sftp:
+                for attr in self.sftp.listdir_attr():
+                    if not stat.S_ISDIR(attr.st_mode or 0):
+                        files[attr.filename] = {'size': attr.st_size, 'mtime': attr.st_mtime}
+            else:
+                try:
+                    for name, facts in self.connection.mlsd(facts=['type', 'size', 'modify']):
+                        if facts.get('type', 'file') == 'file':
+                            size = facts.get('size')
+                            files[name] = {'size': int(size) if size else None, 'mtime': facts.get('modify')}
+                except ftplib.error_perm:
+                    # Server without MLSD: one SIZE and MDTM command per file
+                    self.connection.voidcmd('TYPE I')
+                    for name in self.connection.nlst():
+                        info = self._ftp_file_info(name)
+                        if info is not None:
+                            files[name] = info
+            return True, files, "Files listed successfully"
+        except Exception as e:
+            return False, {}, f"Error listing files: {str(e)}"
+
+    def list_changed_files(self, manifest: Optional[RemoteManifest] = None) -> Tuple[bool, Dict[str, Dict], str]:
+        """List files in current directory that changed since their last recorded import.
+
+        Returns the changed files with their list_file_info metadata, to be
+        recorded in the manifest once the file is imported successfully.
+        """
+        manifest = manifest or remote_manifest
+        success, files, message = self.list_file_info()
+        if not success:
+            return False, {}, message
+
+        _, directory, _ = self.get_current_directory()
+        changed = {
+            filename: info for filename, info in files.items()
+            if manifest.has_changed(self.remote_key(filename, directory), info)
+        }
+        return True, changed, f"{len(changed)} of {len(files)} files changed"
+
+    def stream_file(self, filename: str, chunk_size: int = CSV_CHUNK_SIZE, hasher=None) -> Iterator[pd.DataFrame]:
+        """Stream a remote CSV file into DataFrame chunks as it downloads.
+
+        Blocks go straight from the data connection to the parser, so only
+        the current chunk is held in memory. The encoding and delimiter are
+        decided from the first block. Excel files need random access and are
+        downloaded whole, then read in chunks. When a hashlib hasher is
+        given, it is updated with the downloaded bytes.
+        """
+        if os.path.splitext(filename)[1].lower() in EXCEL_EXTENSIONS:
+            buffer = BytesIO()
             if self.use_sftp:
-                # SFTP download
                 self.sftp.getfo(filename, buffer)
             else:
-                # FTP download
                 self.connection.retrbinary(f'RETR {filename}', buffer.write)
-
+            if hasher is not None:
+                hasher.update(buffer.getbuffer())
             buffer.seek(0)
-            
-            # Try to determine file type from extension
-            file_ext = os.path.splitext(filename)[1].lower()
-            
+            yield from iter_excel_chunks(buffer, chunk_size=chunk_size)
+            return
+
+        if self.use_sftp:
+            # No prefetch: paramiko would otherwise buffer the whole file ahead of the parser
+            with self.sftp.open(filename, 'rb') as remote_file:
+                stream = _HashingStream(remote_file, hasher) if hasher is not None else remote_file
+                yield from iter_csv_chunks(stream, chunk_size=chunk_size)
+            return
+
+        self.connection.voidcmd('TYPE I')
+        sock = self.connection.transfercmd(f'RETR {filename}')
+        stream = sock.makefile('rb')
+        try:
+            yield from iter_csv_chunks(
+                _HashingStream(stream, hasher) if hasher is not None else stream, chunk_size=chunk_size
+            )
+        finally:
+            stream.close()
+            sock.close()
             try:
-                if file_ext in ['.xlsx', '.xls']:
-                    df = pd.read_excel(buffer)
-                else:  # Default to CSV
-                    # Try different encodings
-                    encodings = ['utf-8', 'latin-1', 'cp1252']
-                    for encoding in encodings:
-                        try:
-                            buffer.seek(0)
-                            df = pd.read_csv(buffer, encoding=encoding)
-                            break
-                        except UnicodeDecodeError:
-                            continue
-                    else:
-                        return False, pd.DataFrame(), "Unable to decode file with supported encodings"
-                
-                return True, df, "File downloaded and parsed successfully"
+                # Consume the transfer reply, which is an error if the stream was abandoned early
+                self.connection.voidresp()
+            except ftplib.all_errors:
+                pass
+
+    def _open_segment_sessions(self, count: int) -> List[Tuple[paramiko.SFTPClient, Optional[PooledConnection]]]:
+        """Open up to count extra SFTP sessions for a segmented download.
+
+        With a pool, only leases available right now are taken, so a host at
+        its cap yields fewer sessions instead of segments waiting on each
+        other until the acquire timeout. Without a pool, each session is a
+        new channel on this transport.
+        """
+        sessions = []
+        for _ in range(count):
+            try:
+                if self.pool is None:
+                    sessions.append((paramiko.SFTPClient.from_transport(self.connection), None))
+                    continue
+                pooled = self.pool.try_acquire(self.host, self.port, self.username, self.password, True)
+            except Exception as e:
+                logging.error(f"Error opening extra session to {self.host}: {str(e)}")
+                break
+            if pooled is None:
+                break
+            sessions.append((pooled.sftp, pooled))
+        return sessions
+
+    def _close_segment_session(self, sftp: paramiko.SFTPClient, pooled: Optional[PooledConnection], failed: bool):
+        """Hand an extra session back to the pool, or close its channel"""
+        if pooled is not None:
+            self.pool.release(pooled, discard=failed)
+        else:
+            sftp.close()
+
+    @staticmethod
+    def _download_range(sftp: paramiko.SFTPClient, remote_path: str, local_path: str, offset: int, length: int) -> int:
+        """Copy one byte range of a remote file into the same range of a local file"""
+        received = 0
+        with sftp.open(remote_path, 'rb') as remote_file, open(local_path, 'r+b') as local_file:
+            local_file.seek(offset)
+            end = offset + length
+            for window_start in range(offset, end, SEGMENT_WINDOW_SIZE):
+                window_end = min(window_start + SEGMENT_WINDOW_SIZE, end)
+                blocks = [
+                    (block_start, min(SEGMENT_BLOCK_SIZE, window_end - block_start))
+                    for block_start in range(window_start, window_end, SEGMENT_BLOCK_SIZE)
+                ]
+                # readv pipelines the block requests instead of waiting for each reply
+                for data in remote_file.readv(blocks):
+                    local_file.write(data)
+                    received += len(data)
+        return received
+
+    def download_segmented(self, filename: str, local_path: Optional[str] = None,
+                           segments: int = 4) -> Tuple[bool, str, str]:
+        """Download a SFTP file as parallel byte ranges over separate sessions.
+
+        Servers throttling bandwidth per stream then serve each segment at
+        full rate. The first segment uses the current session; the others
+        only use sessions available without waiting, so a pool at its cap
+        means fewer segments, down to a single stream. The segments are
+        written in place into local_path (a temp file when not given) and the
+        result is checked against the remote size. Returns the local path.
+        """
+        if not self.use_sftp:
+            return False, "", "Segmented downloads require SFTP"
+
+        temp_file = local_path is None
+        try:
+            remote_path = self.sftp.normalize(filename)
+            size = self.sftp.stat(remote_path).st_size
+            if temp_file:
+                fd, local_path = tempfile.mkstemp(suffix=os.path.splitext(filename)[1])
+                os.close(fd)
+
+            with open(local_path, 'wb') as local_file:
+                local_file.truncate(size)
+
+            segments = max(1, min(segments, size // MIN_SEGMENT_SIZE or 1))
+            sessions = [(self.sftp, None)] + self._open_segment_sessions(segments - 1)
+            segment_size = -(-size // len(sessions)) if size else 0
+            ranges = [
+                (offset, min(segment_size, size - offset))
+                for offset in range(0, size, segment_size or 1)
+            ]
+
+            futures = []
+            try:
+                with ThreadPoolExecutor(max_workers=max(len(ranges), 1)) as executor:
+                    futures = [
+                        executor.submit(self._download_range, sftp, remote_path, local_path, offset, length)
+                        for (sftp, _), (offset, length) in zip(sessions, ranges)
+                    ]
+            finally:
+                for index, (sftp, pooled) in enumerate(sessions[1:], start=1):
+                    failed = index < len(futures) and futures[index].exception() is not None
+                    self._close_segment_session(sftp, pooled, failed)
+            received = sum(future.result() for future in futures)
+
+            if received != size or os.path.getsize(local_path) != size:
+                raise IOError(f"Size mismatch: expected {size} bytes, received {received}")
+            return True, local_path, f"Downloaded {size} bytes in {len(ranges)} segments"
+
+        except Exception as e:
+            if temp_file and local_path and os.path.exists(local_path):
+                os.remove(local_path)
+            return False, "", f"Error downloading file: {str(e)}"
+
+    @staticmethod
+    def _parse_local_file(local_path: str) -> pd.DataFrame:
+        """Parse a downloaded copy of a remote file"""
+        if detect_file_format(local_path) != 'csv':
+            chunks = list(iter_excel_chunks(local_path))
+        else:
+            chunks = list(iter_csv_chunks(local_path))
+        return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+
+    def download_file(self, filename: str, segments: int = 1, resume: bool = False) -> Tuple[bool, pd.DataFrame, str]:
+        """Download and parse file.
+
+        With segments > 1 a SFTP file is read over several parallel sessions;
+        with resume the file goes through a checkpointed local copy, so an
+        interrupted download continues where it stopped.
+        """
+        if (segments > 1 and self.use_sftp) or resume:
+            if segments > 1 and self.use_sftp:
+                success, local_path, message = self.download_segmented(filename, segments=segments)
+            else:
+                local_path = os.path.join(
+                    TRANSFER_CHECKPOINT_DIR,
+                    hashlib.sha1(self.remote_key(filename).encode('utf-8')).hexdigest() + os.path.splitext(filename)[1]
+                )
+                os.makedirs(TRANSFER_CHECKPOINT_DIR, exist_ok=True)
+                success, message = self.download_to_file(filename, local_path)
+            if not success:
+                return False, pd.DataFrame(), message
+            try:
+                return True, self._parse_local_file(local_path), "File downloaded and parsed successfully"
             except Exception as parse_error:
                 return False, pd.DataFrame(), f"Error parsing file: {str(parse_error)}"
-                
+            finally:
+                os.remove(local_path)
+
+        try:
+            chunks = list(self.stream_file(filename))
+            df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+            return True, df, "File downloaded and parsed successfully"
+        except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError, ValueError) as parse_error:
+            return False, pd.DataFrame(), f"Error parsing file: {str(parse_error)}"
         except Exception as e:
             return False, pd.DataFrame(), f"Error downloading file: {str(e)}"
 
-    def upload_file(self, local_path: str, remote_path: str) -> Tuple[bool, str]:
-        """Upload file to server"""
+    def _reconnect(self) -> Tuple[bool, str]:
+        """Replace a dropped session with a new one in the same directory"""
+        directory = getattr(self, '_transfer_directory', None)
+        if self.pooled is not None:
+            self._lease.detach()
+            self.pool.release(self.pooled, discard=True)
+            self.connection, self.sftp, self.pooled, self._lease = None, None, None, None
+        else:
+            self.disconnect()
+        success, message = self.connect()
+        if success and directory:
+            success, message = self.change_directory(directory)
+        return success, message
+
+    def _absolute_path(self, remote_path: str) -> str:
+        """Resolve a remote path against the current directory"""
+        _, directory, _ = self.get_current_directory()
+        self._transfer_directory = directory
+        return posixpath.join(directory or '/', remote_path)
+
+    def _remote_info(self, remote_path: str) -> Optional[Dict]:
+        """Get size and modification time of a remote file, None if it does not exist"""
+        if self.use_sftp:
+            try:
+                attr = self.sftp.stat(remote_path)
+            except FileNotFoundError:
+                return None
+            return {'size': attr.st_size, 'mtime': attr.st_mtime}
+        self.connection.voidcmd('TYPE I')
+        return self._ftp_file_info(remote_path)
+
+    @staticmethod
+    def _checkpoint_path(direction: str, remote_key: str, local_path: str) -> str:
+        digest = hashlib.sha1(f"{direction}|{remote_key}|{os.path.abspath(local_path)}".encode('utf-8')).hexdigest()
+        return os.path.join(TRANSFER_CHECKPOINT_DIR, f"{direction}_{digest}.json")
+
+    @staticmethod
+    def _load_checkpoint(checkpoint_path: str) -> Optional[Dict]:
+        try:
+            with open(checkpoint_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _save_checkpoint(checkpoint_path: str, checkpoint: Dict):
+        if not os.path.exists(TRANSFER_CHECKPOINT_DIR):
+            os.makedirs(TRANSFER_CHECKPOINT_DIR, exist_ok=True)
+        temp_path = f"{checkpoint_path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({**checkpoint, 'updated_at': datetime.utcnow().isoformat()}, f)
+        os.replace(temp_path, checkpoint_path)
+
+    @staticmethod
+    def _remove_checkpoint(checkpoint_path: str):
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
+    def _reset_restart_marker(self):
+        """Clear a REST offset the server kept after a refused transfer"""
         try:
+            self.connection.sendcmd('REST 0')
+        except ftplib.all_errors:
+            pass
+
+    def _retrieve_from(self, remote_path: str, part_path: str, offset: int):
+        """Append the remote file from offset to the partial local file"""
+        with open(part_path, 'r+b' if offset else 'wb') as local_file:
+            local_file.seek(offset)
+            local_file.truncate()
+            if self.use_sftp:
+                with self.sftp.open(remote_path, 'rb') as remote_file:
+                    remote_file.seek(offset)
+                    while True:
+                        data = remote_file.read(TRANSFER_BLOCK_SIZE)
+                        if not data:
+                            break
+                        local_file.write(data)
+            else:
+                self.connection.retrbinary(
+                    f'RETR {remote_path}', local_file.write, TRANSFER_BLOCK_SIZE, rest=offset or None
+                )
+
+    def download_to_file(self, filename: str, local_path: str, retries: int = 3) -> Tuple[bool, str]:
+        """Download a file to disk, resuming after dropped connections.
+
+        Bytes are written to local_path + '.part' while a checkpoint on disk
+        records which remote file (size and modification time) it belongs to.
+        Retries, and later calls for the same file, continue from the partial
+        file's size with REST (FTP) or a seek (SFTP) instead of from zero.
+        """
+        part_path = f"{local_path}.part"
+        try:
+            remote_path = self._absolute_path(filename)
+            checkpoint_path = self._checkpoint_path('download', self.remote_key(remote_path), local_path)
+            info = self._remote_info(remote_path)
+            if info is None:
+                return False, f"Error downloading file: {filename} not found"
+
+            checkpoint = self._load_checkpoint(checkpoint_path)
+            if not checkpoint or checkpoint.get('size') != info['size'] or checkpoint.get('mtime') != info['mtime']:
+                # No partial download of this version of the file: start from zero
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+            checkpoint = {'remote_path': remote_path, 'local_path': local_path, **info}
+
+            attempt = 0
+            while True:
+                offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+                self._save_checkpoint(checkpoint_path, {**checkpoint, 'offset': offset})
+                try:
+                    if info['size'] is None or offset < info['size']:
+                        self._retrieve_from(remote_path, part_path, offset)
+                    break
+                except ftplib.error_perm:
+                    if not offset:
+                        raise
+                    # Server without REST support: the only option left is a full download
+                    logging.error(f"Resume not supported for {remote_path}, restarting download")
+                    self._reset_restart_marker()
+                    os.remove(part_path)
+                except RETRYABLE_ERRORS as e:
+                    attempt += 1
+                    if attempt > retries:
+                        raise
+                    received = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+                    logging.error(f"Download of {remote_path} interrupted at {received} bytes ({str(e)}), resuming")
+                    success, message = self._reconnect()
+                    if not success:
+                        raise ConnectionError(message)
+
+            received = os.path.getsize(part_path)
+            if info['size'] is not None and received != info['size']:
+                return False, f"Error downloading file: expected {info['size']} bytes, received {received}"
+            os.replace(part_path, local_path)
+            self._remove_checkpoint(checkpoint_path)
+            return True, "File downloaded successfully"
+
+        except Exception as e:
+            return False, f"Error downloading file: {str(e)}"
+
+    def _store_from(self, local_path: str, remote_path: str, offset: int):
+        """Send the local file from offset, appending to the partial remote file"""
+        with open(local_path, 'rb') as local_file:
+            local_file.seek(offset)
             if self.use_sftp:
-                self.sftp.put(local_path, remote_path)
+                with self.sftp.open(remote_path, 'r+b' if offset else 'wb') as remote_file:
+                    remote_file.seek(offset)
+                    remote_file.set_pipelined(True)
+                    while True:
+                        data = local_file.read(TRANSFER_BLOCK_SIZE)
+                        if not data:
+                            break
+                        remote_file.write(data)
             else:
-                with open(local_path, 'rb') as file:
-                    self.connection.storbinary(f'STOR {remote_path}', file)
+                self.connection.storbinary(
+                    f'STOR {remote_path}', local_file, TRANSFER_BLOCK_SIZE, rest=offset or None
+                )
+
+    def upload_file(self, local_path: str, remote_path: str, retries: int = 3) -> Tuple[bool, str]:
+        """Upload file to server, resuming after dropped connections.
+
+        A checkpoint on disk ties the remote partial file to the local file's
+        size and modification time, so retries and later calls for the same
+        unchanged file continue from the remote size instead of from zero.
+        """
+        try:
+            absolute_path = self._absolute_path(remote_path)
+            checkpoint_path = self._checkpoint_path('upload', self.remote_key(absolute_path), local_path)
+            local_stat = os.stat(local_path)
+            checkpoint = {
+                'remote_path': absolute_path,
+                'local_path': local_path,
+                'size': local_stat.st_size,
+                'mtime': local_stat.st_mtime
+            }
+            previous = self._load_checkpoint(checkpoint_path)
+            resumable = bool(previous) and previous.get('size') == checkpoint['size'] \
+                and previous.get('mtime') == checkpoint['mtime']
+
+            attempt = 0
+            while True:
+                offset = 0
+                if resumable:
+                    info = self._remote_info(absolute_path)
+                    if info and info['size'] is not None and info['size'] <= checkpoint['size']:
+                        offset = info['size']
+                self._save_checkpoint(checkpoint_path, {**checkpoint, 'offset': offset})
+                resumable = True
+                try:
+                    self._store_from(local_path, absolute_path, offset)
+                    break
+                except ftplib.error_perm:
+                    if not offset:
+                        raise
+                    logging.error(f"Resume not supported for {absolute_path}, restarting upload")
+                    self._reset_restart_marker()
+                    resumable = False
+                except RETRYABLE_ERRORS as e:
+                    attempt += 1
+                    if attempt > retries:
+                        raise
+                    logging.error(f"Upload of {absolute_path} interrupted ({str(e)}), resuming")
+                    success, message = self._reconnect()
+                    if not success:
+                        raise ConnectionError(message)
+
+            self._remove_checkpoint(checkpoint_path)
             return True, "File uploaded successfully"
         except Exception as e:
             return False, f"Error uploading file: {str(e)}"
@@ -141,7 +626,8 @@ class FTPService:
         """Get current working directory"""
         try:
             if self.use_sftp:
-                path = self.sftp.getcwd()
+                # getcwd() is None until chdir() is called, and pooled sessions are reset with chdir(None)
+                path = self.sftp.normalize('.')
             else:
                 path = self.connection.pwd()
             return True, path, "Current directory retrieved successfully"
@@ -0,0 +1,152 @@
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np
+from sqlalchemy import select
+from models.database import Catalog
+
+# Rows fetched per round trip while loading the index
+INDEX_LOAD_BATCH_SIZE = 50000
+
+# Numeric barcodes up to GTIN-14 are packed into int64 keys together with their length
+MAX_PACKED_BARCODE_LENGTH = 14
+
+def _owner_key(source: Optional[str], article_code: Optional[str]) -> int:
+    """Compact key of the product owning a barcode, 0 for products without article code.
+
+    Products are identified by (source, article_code): the same article code
+    in another source is a different product.
+    """
+    if not article_code:
+        return 0
+    return hash((source, article_code)) or 1
+
+def _barcode_key(barcode: str) -> Optional[int]:
+    """Pack a numeric barcode into an int64, keeping leading zeros significant"""
+    if len(barcode) <= MAX_PACKED_BARCODE_LENGTH and barcode.isdigit():
+        return int(barcode) * 16 + len(barcode)
+    return None
+
+class ImportIndex:
+    """Barcodes of the catalog and article codes of the importing source,
+    loaded once per import.
+
+    Numeric barcodes are kept in a sorted int64 array with the key of their
+    owning (source, article_code) product, other barcodes in a dict, and the source's article
+    codes as a sorted array of hashes. Rows of the import claim barcodes and
+    article codes as they are staged, so duplicates within the file and
+    against the database are found without a query per row.
+    """
+
+    def __init__(self, source: Optional[str] = None,
+                 barcodes: List[Tuple[str, Optional[str], Optional[str]]] = (), article_codes: List[str] = ()):
+        self.source = source
+        packed_keys, packed_owners = [], []
+        self._other_barcodes: Dict[str, int] = {}
+        for barcode, barcode_source, article_code in barcodes:
+            key = _barcode_key(barcode)
+            if key is None:
+                self._other_barcodes.setdefault(barcode, _owner_key(barcode_source, article_code))
+            else:
+                packed_keys.append(key)
+                packed_owners.append(_owner_key(barcode_source, article_code))
+
+        # Stable sort: for a barcode used by several products, the first loaded owns it
+        keys = np.array(packed_keys, dtype=np.int64)
+        order = np.argsort(keys, kind='stable')
+        self._barcode_keys = keys[order]
+        self._barcode_owners = np.array(packed_owners, dtype=np.int64)[order]
+
+        self._article_keys = np.unique(np.array([hash(code) for code in article_codes], dtype=np.int64))
+
+        # Barcodes claimed and article codes seen by rows of this import
+        self._claimed: Dict[str, int] = {}
+        self._seen_article_codes: Set[str] = set()
+        self._journal: Optional[List[Tuple[str, Optional[int], bool]]] = None
+
+    @classmethod
+    def load(cls, db, source: str) -> 'ImportIndex':
+        """Load every barcode of the catalog and the source's article codes in a few round trips"""
+        barcodes = db.execute(
+            select(Catalog.barcode, Catalog.source, Catalog.article_code)
+            .where(Catalog.barcode.isnot(None), Catalog.barcode != '')
+            .order_by(Catalog.id)
+            .execution_options(yield_per=INDEX_LOAD_BATCH_SIZE)
+        )
+        article_codes = db.execute(
+            select(Catalog.article_code)
+            .where(Catalog.source == source, Catalog.article_code.isnot(None))
+            .execution_options(yield_per=INDEX_LOAD_BATCH_SIZE)
+        ).scalars()
+        return cls(source, list(barcodes), list(article_codes))
+
+    def _stored_owner(self, barcode: str) -> Optional[int]:
+        """Owner key of a barcode in the catalog, None when unused"""
+        key = _barcode_key(barcode)
+        if key is None:
+            return self._other_barcodes.get(barcode)
+        position = np.searchsorted(self._barcode_keys, key)
+        if position < len(self._barcode_keys) and self._barcode_keys[position] == key:
+            return int(self._barcode_owners[position])
+        return None
+
+    def barcode_owner(self, barcode: str) -> Optional[int]:
+        """Owner key of a barcode claimed by this import or used in the catalog"""
+        if barcode in self._claimed:
+            return self._claimed[barcode]
+        return self._stored_owner(barcode)
+
+    def is_duplicate_barcode(self, barcode: str, article_code: Optional[str] = None) -> bool:
+        """Check whether a barcode already belongs to another product.
+
+        A barcode is not a duplicate for the product of the importing source
+        that owns it; rows without article code can never share a barcode.
+        """
+        if not barcode:
+            return False
+        owner = self.barcode_owner(barcode)
+        if owner is None:
+            return False
+        return not article_code or owner != _owner_key(self.source, article_code)
+
+    def claim_barcode(self, barcode: str, article_code: Optional[str] = None):
+        """Record that a row of this import uses a barcode"""
+        if not barcode:
+            return
+        if self._journal is not None:
+            self._journal.append((barcode, self._claimed.get(barcode), barcode in self._claimed))
+        self._claimed[barcode] = _owner_key(self.source, article_code)
+
+    def has_article_code(self, article_code: str) -> bool:
+        """Check whether an article code exists in the source or was seen in this import"""
+        if not article_code:
+            return False
+        if article_code in self._seen_article_codes:
+            return True
+        key = hash(article_code)
+        position = np.searchsorted(self._article_keys, key)
+        return position < len(self._article_keys) and self._article_keys[position] == key
+
+    def add_article_code(self, article_code: str):
+        """Record an article code seen in this import"""
+        if article_code and article_code not in self._seen_article_codes:
+            if self._journal is not None:
+                self._journal.append((article_code, None, None))
+            self._seen_article_codes.add(article_code)
+
+    def begin(self):
+        """Start recording claims, so a failed batch can be rolled back"""
+        self._journal = []
+
+    def commit(self):
+        """Keep the claims recorded since begin()"""
+        self._journal = None
+
+    def rollback(self):
+        """Undo the claims recorded since begin()"""
+        for value, previous, was_claimed in reversed(self._journal or []):
+            if was_claimed is None:
+                self._seen_article_codes.discard(value)
+            elif was_claimed:
+                self._claimed[value] = previous
+            else:
+                self._claimed.pop(value, None)
+        self._journal = None
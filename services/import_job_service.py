@@ -0,0 +1,281 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Iterable, Iterator
+import hashlib
+import itertools
+import logging
+import os
+import pandas as pd
+from services.file_handling_service import FileHandlingService
+from services.staging_service import StagingService
+from services.remote_manifest_service import RemoteManifest, remote_manifest
+from services.import_profile_service import ImportProfileService
+from utils.processors import (
+    standardize_catalog_data, detect_file_format, read_csv_header, schema_read_dtypes, CSV_CHUNK_SIZE
+)
+
+def _normalise_chunks(chunks: Iterable[pd.DataFrame],
+                      column_mapping: Optional[Dict[str, str]] = None) -> Iterator[pd.DataFrame]:
+    """Map and standardise raw feed chunks"""
+    for chunk in chunks:
+        if column_mapping:
+            chunk = chunk.rename(columns=column_mapping)
+        yield standardize_catalog_data(chunk)
+
+def _stage_file(file_path: str, source: str, staging_dir: str, chunk_size: int,
+                column_mapping: Optional[Dict[str, str]] = None, profiles: Optional[List[Dict]] = None) -> str:
+    """Parse, clean and standardise one file in a worker process.
+
+    The normalised chunks are written to a staged Parquet file, so only its
+    path travels back to the writer, never whole DataFrames. The source's
+    import profiles supply the CSV dialect, dtypes and column mapping while
+    one of them reads the file's header as learned (see
+    ImportProfileService.match_dialect); otherwise the dialect is sniffed
+    from the first block. What was used is kept in the staged metadata.
+    """
+    profiles = profiles or []
+    file_name = os.path.basename(file_path)
+    profile = ImportProfileService.profile_for(profiles, file_name)
+    dialect, dtype = None, None
+    if detect_file_format(file_path) == 'csv':
+        matched, dialect, dtype = ImportProfileService.match_dialect(profiles, file_path, file_name)
+        profile = matched or profile
+        if dialect is None:
+            dialect = FileHandlingService.detect_csv_dialect(file_path)
+
+        # Canonical fields are read with the catalog feed schema dtypes
+        header = read_csv_header(file_path, dialect)
+        dtype = {
+            **(dtype or {}),
+            **schema_read_dtypes(
+                header,
+                column_mapping or ImportProfileService.mapping_for(profile, header),
+                FileHandlingService.clean_column_name
+            )
+        }
+
+    chunks = FileHandlingService.read_file_chunks(file_path, chunk_size=chunk_size, dialect=dialect, dtype=dtype)
+    first_chunk = next(chunks, None)
+    header = [str(column) for column in first_chunk.columns] if first_chunk is not None else []
+    column_mapping = column_mapping or ImportProfileService.mapping_for(profile, header)
+    if profile and ImportProfileService.header_signature(header) != profile['header_signature']:
+        profile = None
+
+    return StagingService.stage_chunks(
+        _normalise_chunks(itertools.chain([first_chunk] if first_chunk is not None else [], chunks), column_mapping),
+        source,
+        metadata={
+            'file_name': file_name,
+            'file_date': FileHandlingService.get_file_date(file_path).isoformat(),
+            'dialect': dialect.to_dict() if dialect else None,
+            'header': header,
+            'dtypes': ImportProfileService.learn_dtypes(first_chunk) if first_chunk is not None else {},
+            'column_mapping': column_mapping or {},
+            'profile_used': profile is not None
+        },
+        staging_dir=staging_dir
+    )
+
+class ImportJobService:
+    """Import several feed files at once: worker processes parse and clean
+    files in parallel while the calling process is the only DB writer."""
+
+    def __init__(self, max_workers: Optional[int] = None, chunk_size: int = CSV_CHUNK_SIZE,
+                 column_mapping: Optional[Dict[str, str]] = None, bulk: bool = True,
+                 staging_dir: str = StagingService.DEFAULT_STAGING_DIR):
+        self.max_workers = max_workers or int(os.getenv("IMPORT_WORKERS", os.cpu_count() or 1))
+        self.chunk_size = chunk_size
+        self.column_mapping = column_mapping
+        self.bulk = bulk
+        self.staging_dir = staging_dir
+
+    @staticmethod
+    def _record_failure(file_path: str, source: str, error: Exception):
+        """Store an ImportHistory entry for a file that could not be parsed"""
+        from models.database import WriterSessionLocal, ImportHistory
+
+        db = WriterSessionLocal()
+        try:
+            db.add(ImportHistory(
+                source=source,
+                file_name=os.path.basename(file_path),
+                file_date=FileHandlingService.get_file_date(file_path),
+                status="failed",
+                error_details={'errors': [f"Parsing error: {str(error)}"]}
+            ))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logging.error(f"Error recording failed import for {file_path}: {str(e)}")
+        finally:
+            db.close()
+
+    def replay(self, staging_path: str, archive_missing: bool = True) -> Tuple[bool, str, Dict]:
+        """Import a staged Parquet file, e.g. to re-process or replay a past feed"""
+        from services.validation_service import ValidationService
+
+        metadata = StagingService.get_staged_metadata(staging_path)
+        file_date = metadata.get('file_date')
+        import_metadata = {'staging_path': staging_path}
+        for key in ('dialect', 'header', 'dtypes', 'column_mapping', 'profile_used'):
+            if key in metadata:
+                import_metadata[key] = metadata[key]
+        return ValidationService.process_import(
+            StagingService.read_staged_chunks(staging_path, self.chunk_size),
+            source=metadata['source'],
+            file_date=datetime.fromisoformat(file_date) if file_date else datetime.utcnow(),
+            bulk=self.bulk,
+            file_name=metadata.get('file_name', os.path.basename(staging_path)),
+            archive_missing=archive_missing,
+            import_metadata=import_metadata
+        )
+
+    @staticmethod
+    def _archive_missing(source: str, article_codes: List[Optional[str]]) -> int:
+        """Archive the source's products missing from every file of a split feed"""
+        from models.database import WriterSessionLocal
+        from services.validation_service import ValidationService
+        from services.catalog_stats_service import catalog_stats
+
+        db = WriterSessionLocal()
+        try:
+            archived = ValidationService.archive_missing_products(db, article_codes, source)
+        finally:
+            db.close()
+        catalog_stats.invalidate()
+        return archived
+
+    def run(self, file_paths: List[str], source: Optional[str] = None) -> Dict[str, Dict]:
+        """Import the given files and return the outcome per file path.
+
+        Without a source, each file is imported as its own source named after
+        the file. With a shared source the feed is split across the files, so
+        products missing from all of them are archived once, after every file
+        imported successfully (reported in the last file's stats). Files reuse
+        their source's import profile (see ImportProfileService) while their
+        header is unchanged.
+        """
+        results = {}
+        # Article codes of the shared source's files, None once a file failed
+        feed_products: Optional[List[Optional[str]]] = []
+        last_path = None
+        sources = {
+            file_path: source or os.path.splitext(os.path.basename(file_path))[0]
+            for file_path in file_paths
+        }
+        profiles = {
+            file_source: ImportProfileService.get_profiles(file_source)
+            for file_source in set(sources.values())
+        }
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(
+                    _stage_file, file_path, sources[file_path], self.staging_dir, self.chunk_size,
+                    self.column_mapping, profiles[sources[file_path]]
+                ): file_path
+                for file_path in file_paths
+            }
+
+            # Files are written in completion order, one at a time
+            for future in as_completed(futures):
+                file_path = futures[future]
+                try:
+                    staging_path = future.result()
+                except Exception as e:
+                    logging.error(f"Error staging file {file_path}: {str(e)}")
+                    ImportJobService._record_failure(file_path, sources[file_path], e)
+                    results[file_path] = {
+                        'success': False,
+                        'message': f"Parsing failed: {str(e)}",
+                        'stats': {}
+                    }
+                    feed_products = None
+                    continue
+
+                success, message, stats = self.replay(staging_path, archive_missing=source is None)
+                results[file_path] = {
+                    'success': success,
+                    'message': message,
+                    'stats': stats,
+                    'staging_path': staging_path
+                }
+                if not success:
+                    feed_products = None
+                    continue
+                last_path = file_path
+                if source is not None and feed_products is not None:
+                    feed_products.extend(StagingService.read_staged_column(staging_path, 'article_code'))
+
+        if source is not None and last_path is not None:
+            if feed_products is None:
+                logging.error(f"Not archiving missing products of {source}: some files of the feed failed")
+            else:
+                try:
+                    results[last_path]['stats']['archived'] = ImportJobService._archive_missing(source, feed_products)
+                except Exception as e:
+                    logging.error(f"Error archiving missing products of {source}: {str(e)}")
+
+        return results
+
+    def run_remote(self, ftp_service, source: Optional[str] = None,
+                   manifest: Optional[RemoteManifest] = None) -> Dict[str, Dict]:
+        """Import the files of the connected FTP/SFTP directory that changed since
+        their last successful import, and return the outcome per file name.
+
+        Files are streamed through the shared session one at a time. A file
+        whose timestamp changed but whose content hash did not is not imported.
+        """
+        manifest = manifest or remote_manifest
+        success, changed, message = ftp_service.list_changed_files(manifest)
+        if not success:
+            logging.error(f"Error listing changed files on {ftp_service.host}: {message}")
+            return {}
+
+        results = {}
+        for filename, info in changed.items():
+            key = ftp_service.remote_key(filename)
+            file_source = source or os.path.splitext(filename)[0]
+            hasher = hashlib.sha256()
+            try:
+                staging_path = StagingService.stage_chunks(
+                    _normalise_chunks(ftp_service.stream_file(filename, self.chunk_size, hasher=hasher),
+                                      self.column_mapping),
+                    file_source,
+                    metadata={
+                        'file_name': filename,
+                        'file_date': ftp_service.get_file_date(info).isoformat(),
+                        'remote_path': key
+                    },
+                    staging_dir=self.staging_dir
+                )
+            except Exception as e:
+                logging.error(f"Error staging remote file {key}: {str(e)}")
+                results[filename] = {
+                    'success': False,
+                    'message': f"Download failed: {str(e)}",
+                    'stats': {}
+                }
+                continue
+
+            content_hash = hasher.hexdigest()
+            if manifest.is_same_content(key, content_hash):
+                os.remove(staging_path)
+                manifest.record(key, info, content_hash)
+                results[filename] = {
+                    'success': True,
+                    'message': "File content unchanged, import skipped",
+                    'stats': {}
+                }
+                continue
+
+            success, message, stats = self.replay(staging_path, archive_missing=source is None)
+            if success:
+                manifest.record(key, info, content_hash)
+            results[filename] = {
+                'success': success,
+                'message': message,
+                'stats': stats,
+                'staging_path': staging_path
+            }
+
+        return results
@@ -0,0 +1,174 @@
+from typing import Dict, List, Optional, Iterable, Tuple
+import hashlib
+import json
+import logging
+import os
+import re
+import pandas as pd
+from models.database import SessionLocal, ImportProfile
+from services.file_handling_service import FileHandlingService
+from utils.processors import STRING_DTYPE, CSVDialect, read_csv_header
+
+class ImportProfileService:
+    """Per-feed import settings (CSV dialect, dtypes, column mapping and key
+    column) learned from the last successful import, so routine imports of
+    the same feed skip sniffing and mapping.
+
+    Profiles are kept per (source, file pattern), so the files of a split
+    feed each keep their own. The dialect and dtypes only apply while they
+    read the header the profile was learned from; otherwise the file is
+    sniffed and the next successful import replaces the profile. Only the
+    mapping of the columns still present is carried over.
+    """
+
+    @staticmethod
+    def header_signature(columns: Iterable) -> str:
+        """Hash of the normalised column names, in order"""
+        names = [FileHandlingService.clean_column_name(column) for column in columns]
+        return hashlib.md5(json.dumps(names).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def learn_dtypes(df: pd.DataFrame) -> Dict[str, str]:
+        """Get the dtype of each column, keyed by normalised column name"""
+        return {
+            FileHandlingService.clean_column_name(column): str(dtype)
+            for column, dtype in df.dtypes.items()
+        }
+
+    @staticmethod
+    def read_dtypes(profile: Dict, header: List[str]) -> Dict[str, str]:
+        """Get read_csv dtypes for a header matching the profile.
+
+        Text columns are read as strings, which skips type inference and
+        keeps codes such as barcodes from turning into floats in chunks
+        where they happen to look numeric.
+        """
+        dtypes = profile.get('dtypes') or {}
+        return {
+            column: STRING_DTYPE for column in header
+            if dtypes.get(FileHandlingService.clean_column_name(column)) in ('object', 'string')
+        }
+
+    @staticmethod
+    def mapping_for(profile: Optional[Dict], header: Iterable) -> Dict[str, str]:
+        """Get the profile's column mapping for the columns still present in header.
+
+        Mappings are by column name, so they stay valid for the remaining
+        columns when a header changes, unlike the dialect and dtypes.
+        """
+        if not profile:
+            return {}
+        present = {FileHandlingService.clean_column_name(column) for column in header}
+        return {
+            column: target for column, target in (profile.get('column_mapping') or {}).items()
+            if FileHandlingService.clean_column_name(column) in present
+        }
+
+    @staticmethod
+    def file_pattern(file_name: Optional[str]) -> str:
+        """Base name of a feed file with dates and timestamps (4+ digits) masked.
+
+        Daily exports such as tarif_20241017.csv share a profile, while the
+        parts of a split feed (part1.csv, part2.csv) keep one each.
+        """
+        if not file_name:
+            return ''
+        return re.sub(r'\d{4,}', '#', os.path.basename(str(file_name)))
+
+    @staticmethod
+    def _profile_to_dict(profile: ImportProfile) -> Dict:
+        return {
+            'source': profile.source,
+            'file_pattern': profile.file_pattern or '',
+            'header_signature': profile.header_signature,
+            'header': profile.header or [],
+            'dialect': profile.dialect,
+            'dtypes': profile.dtypes or {},
+            'column_mapping': profile.column_mapping or {},
+            'key_column': profile.key_column,
+            'import_count': profile.import_count,
+            'updated_at': profile.updated_at
+        }
+
+    @staticmethod
+    def get_profiles(source: str) -> List[Dict]:
+        """Get the import profiles of a source, most recently updated first"""
+        db = SessionLocal()
+        try:
+            profiles = db.query(ImportProfile).filter(ImportProfile.source == source) \
+                .order_by(ImportProfile.updated_at.desc(), ImportProfile.id.desc()).all()
+            return [ImportProfileService._profile_to_dict(profile) for profile in profiles]
+        except Exception as e:
+            logging.error(f"Error loading import profiles for {source}: {str(e)}")
+            return []
+        finally:
+            db.close()
+
+    @staticmethod
+    def profile_for(profiles: List[Dict], file_name: Optional[str]) -> Optional[Dict]:
+        """Get the profile of the file's pattern, else the source's latest one"""
+        pattern = ImportProfileService.file_pattern(file_name)
+        return next((profile for profile in profiles if profile['file_pattern'] == pattern),
+                    profiles[0] if profiles else None)
+
+    @staticmethod
+    def match_dialect(profiles: List[Dict], file, file_name: Optional[str] = None
+                      ) -> Tuple[Optional[Dict], Optional[CSVDialect], Dict[str, str]]:
+        """Find the profile whose CSV dialect reads the file's header as learned.
+
+        The profile of the file's pattern is tried first, then the source's
+        other profiles. A dialect that cannot parse the file, e.g. a stale
+        profile with another preamble or encoding, is skipped. Returns
+        (profile, dialect, dtypes), or (None, None, {}) when the file has to
+        be sniffed.
+        """
+        pattern = ImportProfileService.file_pattern(file_name)
+        for profile in sorted(profiles, key=lambda profile: profile['file_pattern'] != pattern):
+            if not profile.get('dialect'):
+                continue
+            dialect = CSVDialect.from_dict(profile['dialect'])
+            try:
+                header = read_csv_header(file, dialect)
+            except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError, ValueError) as e:
+                logging.warning(f"Import profile {profile['source']}/{profile['file_pattern']} "
+                              f"does not read {file_name or 'file'}: {str(e)}")
+                continue
+            if ImportProfileService.header_signature(header) == profile['header_signature']:
+                return profile, dialect, ImportProfileService.read_dtypes(profile, header)
+        return None, None, {}
+
+    @staticmethod
+    def save_profile(source: str, header: List[str], dialect: Optional[Dict] = None,
+                     dtypes: Optional[Dict[str, str]] = None,
+                     column_mapping: Optional[Dict[str, str]] = None,
+                     file_name: Optional[str] = None) -> bool:
+        """Create or refresh the profile of a source's file pattern after a successful import"""
+        column_mapping = column_mapping or {}
+        file_pattern = ImportProfileService.file_pattern(file_name)
+        key_column = next(
+            (column for column, target in column_mapping.items() if target == 'article_code'),
+            'article_code' if 'article_code' in header else None
+        )
+        db = SessionLocal()
+        try:
+            profile = db.query(ImportProfile).filter(
+                ImportProfile.source == source, ImportProfile.file_pattern == file_pattern
+            ).first()
+            if profile is None:
+                profile = ImportProfile(source=source, file_pattern=file_pattern, import_count=0)
+                db.add(profile)
+            profile.header_signature = ImportProfileService.header_signature(header)
+            profile.header = [str(column) for column in header]
+            profile.dialect = CSVDialect.from_dict(dialect).to_dict() if dialect else None
+            profile.dtypes = dtypes or {}
+            profile.column_mapping = column_mapping
+            profile.key_column = key_column
+            profile.import_count = (profile.import_count or 0) + 1
+            db.commit()
+            return True
+        except Exception as e:
+            db.rollback()
+            logging.error(f"Error saving import profile for {source}: {str(e)}")
+            return False
+        finally:
+            db.close()
@@ -0,0 +1,83 @@
+from datetime import datetime
+from typing import Dict, Optional
+import json
+import logging
+import os
+import threading
+
+class RemoteManifest:
+    """Last successfully imported state of remote feed files, stored as JSON.
+
+    Entries are keyed on the full remote path (see FTPService.remote_key) and
+    hold the size and modification time reported by the server plus a hash
+    of the downloaded content.
+    """
+
+    def __init__(self, manifest_file: str = "remote_manifest.json"):
+        self.manifest_file = manifest_file
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict]] = None
+
+    def _load(self) -> Dict[str, Dict]:
+        """Load the manifest from disk on first use (lock held)"""
+        if self._entries is None:
+            self._entries = {}
+            if os.path.exists(self.manifest_file):
+                try:
+                    with open(self.manifest_file, 'r') as f:
+                        self._entries = json.load(f)
+                except (OSError, ValueError) as e:
+                    logging.error(f"Error loading remote manifest {self.manifest_file}: {str(e)}")
+        return self._entries
+
+    def _save(self):
+        """Write the manifest atomically so a crash never leaves it truncated (lock held)"""
+        temp_file = f"{self.manifest_file}.tmp"
+        with open(temp_file, 'w') as f:
+            json.dump(self._entries, f, indent=2)
+        os.replace(temp_file, self.manifest_file)
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Get the recorded state of a remote file"""
+        with self._lock:
+            entry = self._load().get(key)
+            return dict(entry) if entry else None
+
+    def has_changed(self, key: str, info: Dict) -> bool:
+        """Check whether a remote file differs from its last imported state.
+
+        Files are considered changed when never imported, or when the server
+        reports neither size nor modification time.
+        """
+        entry = self.get(key)
+        if entry is None:
+            return True
+        if info.get('size') is None and info.get('mtime') is None:
+            return True
+        return entry.get('size') != info.get('size') or entry.get('mtime') != info.get('mtime')
+
+    def is_same_content(self, key: str, content_hash: str) -> bool:
+        """Check whether downloaded content matches the last imported content"""
+        entry = self.get(key)
+        return bool(entry) and entry.get('content_hash') == content_hash
+
+    def record(self, key: str, info: Dict, content_hash: Optional[str] = None):
+        """Record the state of a remote file after a successful import"""
+        with self._lock:
+            entries = self._load()
+            entries[key] = {
+                'size': info.get('size'),
+                'mtime': info.get('mtime'),
+                'content_hash': content_hash or (entries.get(key) or {}).get('content_hash'),
+                'recorded_at': datetime.utcnow().isoformat()
+            }
+            self._save()
+
+    def forget(self, key: str):
+        """Drop a remote file from the manifest so it is imported again"""
+        with self._lock:
+            if self._load().pop(key, None) is not None:
+                self._save()
+
+# Global instance
+remote_manifest = RemoteManifest(os.getenv("REMOTE_MANIFEST_FILE", "remote_manifest.json"))
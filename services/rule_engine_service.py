@@ -0,0 +1,195 @@
+from typing import Callable, Dict, List, Optional, Tuple
+import json
+import re
+import pandas as pd
+from utils.validators import validate_ean13_series
+
+# Actions a rule can take on the rows it hits
+ACTIONS = ('clear', 'reject', 'flag')
+
+DEFAULT_ACTIONS = {
+    'barcode': 'clear',
+    'ean13': 'clear',
+    'regex': 'flag',
+    'range': 'flag',
+    'required': 'reject'
+}
+
+def _parse_condition(condition: Optional[str]) -> Dict:
+    """Read a rule condition: a JSON object, or a bare field name"""
+    condition = (condition or '').strip()
+    if not condition:
+        return {}
+    if condition.startswith('{'):
+        return json.loads(condition)
+    return {'field': condition}
+
+def _is_blank(values: pd.Series) -> pd.Series:
+    """Rows that are null or only whitespace"""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.isna()
+    return values.astype('string').str.strip().fillna('').eq('')
+
+def _barcode_check(values: pd.Series, condition: Dict) -> pd.Series:
+    """Rows with a barcode that is not 8, 12, 13 or 14 digits (see ValidationService.validate_barcode)"""
+    values = values.astype('string').str.strip()
+    present = values.fillna('').ne('')
+    return present & ~values.str.fullmatch(r'[0-9]{8}|[0-9]{12,14}').fillna(False).astype(bool)
+
+def _ean13_check(values: pd.Series, condition: Dict) -> pd.Series:
+    """Rows with a barcode whose EAN-13 checksum is wrong"""
+    values = values.astype('string').str.strip()
+    return values.fillna('').ne('') & ~validate_ean13_series(values)
+
+def _regex_check(pattern: str) -> Callable[[pd.Series, Dict], pd.Series]:
+    re.compile(pattern)
+
+    def check(values: pd.Series, condition: Dict) -> pd.Series:
+        """Rows with a value not matching the pattern"""
+        values = values.astype('string')
+        return values.notna() & ~values.str.contains(pattern, regex=True).fillna(True).astype(bool)
+    return check
+
+def _range_check(values: pd.Series, condition: Dict) -> pd.Series:
+    """Rows with a numeric value outside [min, max]"""
+    numbers = pd.to_numeric(values, errors='coerce')
+    hits = pd.Series(False, index=values.index)
+    if condition.get('min') is not None:
+        hits |= numbers < float(condition['min'])
+    if condition.get('max') is not None:
+        hits |= numbers > float(condition['max'])
+    return hits
+
+def _required_check(values: pd.Series, condition: Dict) -> pd.Series:
+    """Rows with an empty value"""
+    return _is_blank(values)
+
+class CompiledRule:
+    """A ValidationRule turned into a vectorised check over one column"""
+
+    def __init__(self, rule_id: int, name: str, rule_type: str, field: str, action: str,
+                 check: Callable[[pd.Series, Dict], pd.Series], condition: Dict):
+        self.rule_id = rule_id
+        self.name = name
+        self.rule_type = rule_type
+        self.field = field
+        self.action = action
+        self.check = check
+        self.condition = condition
+
+    def evaluate(self, df: pd.DataFrame) -> pd.Series:
+        """Boolean mask of the rows the rule hits"""
+        if self.field not in df.columns:
+            # A missing column only fails required-field checks
+            return pd.Series(self.rule_type == 'required', index=df.index)
+        return self.check(df[self.field], self.condition).fillna(False).astype(bool)
+
+class RuleEngine:
+    """Active validation rules compiled once per import and run over whole chunks.
+
+    Rule conditions are JSON objects naming a field plus the rule's
+    parameters, e.g. {"field": "article_code", "pattern": "^[A-Z0-9-]+$"} for
+    regex rules or {"field": "price", "min": 0} for range rules; a bare
+    field name is accepted too. Actions are 'clear' (blank the value),
+    'reject' (skip the row) or 'flag' (only count it). Hits are counted per
+    rule across all chunks.
+    """
+
+    def __init__(self, rules: List[CompiledRule]):
+        self.rules = rules
+        self.hits: Dict[int, int] = {rule.rule_id: 0 for rule in rules}
+        self.rejected: Dict[int, int] = {rule.rule_id: 0 for rule in rules}
+
+    @staticmethod
+    def compile_rule(rule) -> CompiledRule:
+        """Compile one ValidationRule, raising ValueError for an unusable rule"""
+        try:
+            condition = _parse_condition(rule.condition)
+        except ValueError as e:
+            raise ValueError(f"invalid condition: {str(e)}")
+
+        rule_type = (rule.rule_type or '').lower()
+        field = condition.get('field') or ('barcode' if rule_type in ('barcode', 'ean13') else None)
+        if not field:
+            raise ValueError("condition names no field")
+
+        if rule_type == 'barcode':
+            check = _barcode_check
+        elif rule_type == 'ean13':
+            check = _ean13_check
+        elif rule_type == 'regex':
+            if not condition.get('pattern'):
+                raise ValueError("regex rule without pattern")
+            try:
+                check = _regex_check(condition['pattern'])
+            except re.error as e:
+                raise ValueError(f"invalid pattern: {str(e)}")
+        elif rule_type == 'range':
+            if condition.get('min') is None and condition.get('max') is None:
+                raise ValueError("range rule without min or max")
+            check = _range_check
+        elif rule_type == 'required':
+            check = _required_check
+        else:
+            raise ValueError(f"unknown rule type '{rule.rule_type}'")
+
+        action = (rule.action or DEFAULT_ACTIONS[rule_type]).lower()
+        if action not in ACTIONS:
+            if rule_type != 'barcode':
+                raise ValueError(f"unknown action '{rule.action}'")
+            # Barcode rules predate actions and always cleared invalid barcodes
+            action = DEFAULT_ACTIONS[rule_type]
+        return CompiledRule(rule.id, rule.name, rule_type, field, action, check, condition)
+
+    @classmethod
+    def compile(cls, rules: List) -> Tuple['RuleEngine', List[str]]:
+        """Compile the active rules in priority order; unusable rules are skipped and reported"""
+        compiled, errors = [], []
+        for rule in rules:
+            try:
+                compiled.append(cls.compile_rule(rule))
+            except ValueError as e:
+                errors.append(f"Rule '{rule.name}' skipped: {str(e)}")
+        return cls(compiled), errors
+
+    def apply(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Run every rule over a chunk and return its (accepted, rejected) rows"""
+        if df.empty or not self.rules:
+            return df, df.iloc[:0]
+
+        df = df.copy()
+        keep = pd.Series(True, index=df.index)
+        for rule in self.rules:
+            hits = rule.evaluate(df) & keep
+            count = int(hits.sum())
+            if not count:
+                continue
+            self.hits[rule.rule_id] += count
+
+            if rule.action == 'reject':
+                keep &= ~hits
+                self.rejected[rule.rule_id] += count
+            elif rule.action == 'clear' and rule.field in df.columns:
+                column = df[rule.field]
+                if pd.api.types.is_numeric_dtype(column):
+                    df[rule.field] = column.mask(hits)
+                else:
+                    df.loc[hits.to_numpy(), rule.field] = ''
+        return df[keep], df[~keep]
+
+    def executions(self, import_id: int) -> List[Dict]:
+        """ImportRuleExecution rows for the rules of this import"""
+        return [
+            {
+                'import_id': import_id,
+                'rule_id': rule.rule_id,
+                'records_affected': self.hits[rule.rule_id],
+                'execution_details': {
+                    'rule_type': rule.rule_type,
+                    'field': rule.field,
+                    'action': rule.action,
+                    'rejected': self.rejected[rule.rule_id]
+                }
+            }
+            for rule in self.rules
+        ]
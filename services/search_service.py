@@ -0,0 +1,172 @@
+from typing import List, Optional, Tuple
+import logging
+import re
+from sqlalchemy import text, select, or_, and_, literal
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from models.database import SessionLocal, Catalog, engine
+
+# Catalog columns covered by the full-text index, with their ranking weight
+SEARCH_COLUMNS = {
+    'name': 10.0,
+    'description': 1.0,
+    'reference': 5.0,
+    'article_code': 10.0,
+    'barcode': 10.0
+}
+
+# SQLite FTS5 table over catalogs, kept in sync by triggers
+SQLITE_SEARCH_TABLE = "catalog_search"
+
+# PostgreSQL text search configuration: French stemming without accents
+POSTGRES_SEARCH_CONFIG = "catalog_fr"
+
+# Terms of a query beyond this are ignored
+MAX_QUERY_TERMS = 10
+
+class SearchService:
+    """Full-text product search: FTS5 on SQLite, tsvector + GIN on PostgreSQL.
+
+    The index covers name, description, reference, article code and barcode
+    and is maintained by the database itself (triggers on SQLite, a
+    generated column on PostgreSQL), so imports keep it in sync. Matching is
+    accent-insensitive, every query term matches as a prefix and all terms
+    must match. Other databases fall back to LIKE scans.
+    """
+
+    @staticmethod
+    def query_terms(query: str) -> List[str]:
+        """Split a user query into lowercase word terms"""
+        return re.findall(r'\w+', (query or '').lower())[:MAX_QUERY_TERMS]
+
+    @staticmethod
+    def _ensure_sqlite_index(connection, rebuild: bool = False):
+        columns = ', '.join(SEARCH_COLUMNS)
+        new_values = ', '.join(f"new.{column}" for column in SEARCH_COLUMNS)
+        old_values = ', '.join(f"old.{column}" for column in SEARCH_COLUMNS)
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': SQLITE_SEARCH_TABLE}
+        ).first() is not None
+
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_SEARCH_TABLE} USING fts5("
+            f"{columns}, content='catalogs', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        ))
+        connection.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {SQLITE_SEARCH_TABLE}_ai AFTER INSERT ON catalogs BEGIN "
+            f"INSERT INTO {SQLITE_SEARCH_TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+        ))
+        connection.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {SQLITE_SEARCH_TABLE}_ad AFTER DELETE ON catalogs BEGIN "
+            f"INSERT INTO {SQLITE_SEARCH_TABLE}({SQLITE_SEARCH_TABLE}, rowid, {columns}) "
+            f"VALUES ('delete', old.id, {old_values}); END"
+        ))
+        # Only edits of indexed columns touch the index, not stock or price updates
+        connection.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {SQLITE_SEARCH_TABLE}_au AFTER UPDATE OF {columns} ON catalogs BEGIN "
+            f"INSERT INTO {SQLITE_SEARCH_TABLE}({SQLITE_SEARCH_TABLE}, rowid, {columns}) "
+            f"VALUES ('delete', old.id, {old_values}); "
+            f"INSERT INTO {SQLITE_SEARCH_TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+        ))
+        if rebuild or not exists:
+            connection.execute(text(
+                f"INSERT INTO {SQLITE_SEARCH_TABLE}({SQLITE_SEARCH_TABLE}) VALUES ('rebuild')"
+            ))
+
+    @staticmethod
+    def _ensure_postgres_index(connection):
+        try:
+            with connection.begin_nested():
+                connection.execute(text("CREATE EXTENSION IF NOT EXISTS unaccent"))
+            unaccent = 'unaccent, '
+        except Exception as e:
+            logging.error(f"unaccent extension unavailable, search will be accent-sensitive: {str(e)}")
+            unaccent = ''
+
+        def weighted(columns: List[str], weight: str) -> str:
+            document = " || ' ' || ".join(f"coalesce({column}, '')" for column in columns)
+            return f"setweight(to_tsvector('{POSTGRES_SEARCH_CONFIG}', {document}), '{weight}')"
+
+        connection.execute(text(
+            "DO $$ BEGIN "
+            f"IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = '{POSTGRES_SEARCH_CONFIG}') THEN "
+            f"CREATE TEXT SEARCH CONFIGURATION {POSTGRES_SEARCH_CONFIG} (COPY = french); "
+            f"ALTER TEXT SEARCH CONFIGURATION {POSTGRES_SEARCH_CONFIG} "
+            f"ALTER MAPPING FOR hword, hword_part, word WITH {unaccent}french_stem; "
+            "END IF; END $$"
+        ))
+        # A generated column keeps the document current on every insert and upsert
+        connection.execute(text(
+            "ALTER TABLE catalogs ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            "GENERATED ALWAYS AS ("
+            f"{weighted(['name', 'article_code', 'barcode'], 'A')} || "
+            f"{weighted(['reference'], 'B')} || "
+            f"{weighted(['description'], 'C')}"
+            ") STORED"
+        ))
+        connection.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_catalogs_search_vector ON catalogs USING GIN (search_vector)"
+        ))
+
+    @staticmethod
+    def ensure_index(bind=None, rebuild: bool = False):
+        """Create the full-text index and its sync machinery if missing.
+
+        bind is an engine or a connection inside a transaction.
+        """
+        bind = bind or engine
+        if isinstance(bind, Engine):
+            with bind.begin() as connection:
+                SearchService.ensure_index(connection, rebuild)
+        elif bind.dialect.name == 'sqlite':
+            SearchService._ensure_sqlite_index(bind, rebuild)
+        elif bind.dialect.name == 'postgresql':
+            SearchService._ensure_postgres_index(bind)
+
+    @staticmethod
+    def search(query: str, limit: int = 20, offset: int = 0,
+               db: Optional[Session] = None) -> List[Tuple[int, float]]:
+        """Get (catalog id, rank) pairs of the best matches, best first"""
+        terms = SearchService.query_terms(query)
+        if not terms:
+            return []
+
+        close_db = db is None
+        if close_db:
+            db = SessionLocal()
+        try:
+            dialect = db.get_bind().dialect.name
+            params = {'limit': limit, 'offset': offset}
+            if dialect == 'sqlite':
+                weights = ', '.join(str(weight) for weight in SEARCH_COLUMNS.values())
+                params['query'] = ' '.join(f'"{term}"*' for term in terms)
+                # Ordering by the built-in rank column lets FTS5 rank while matching;
+                # bm25() is lower for better matches
+                rows = db.execute(text(
+                    f"SELECT rowid, -rank FROM {SQLITE_SEARCH_TABLE} "
+                    f"WHERE {SQLITE_SEARCH_TABLE} MATCH :query AND rank MATCH 'bm25({weights})' "
+                    "ORDER BY rank LIMIT :limit OFFSET :offset"
+                ), params)
+            elif dialect == 'postgresql':
+                params['query'] = ' & '.join(f"{term}:*" for term in terms)
+                rows = db.execute(text(
+                    "SELECT id, ts_rank_cd(search_vector, query) AS rank "
+                    f"FROM catalogs, to_tsquery('{POSTGRES_SEARCH_CONFIG}', :query) AS query "
+                    "WHERE search_vector @@ query "
+                    "ORDER BY rank DESC, id LIMIT :limit OFFSET :offset"
+                ), params)
+            else:
+                conditions = [
+                    or_(*[getattr(Catalog, column).ilike(f"%{term}%") for column in SEARCH_COLUMNS])
+                    for term in terms
+                ]
+                rows = db.execute(
+                    select(Catalog.id, literal(0.0)).where(and_(*conditions))
+                    .order_by(Catalog.id).limit(limit).offset(offset)
+                )
+            return [(row[0], float(row[1])) for row in rows]
+        finally:
+            if close_db:
+                db.close()
@@ -0,0 +1,130 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Iterable, Iterator
+import glob
+import json
+import logging
+import os
+import re
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from utils.processors import CATALOG_FEED_SCHEMA, STRING_DTYPE, CSV_CHUNK_SIZE
+
+# Key under which the import metadata is stored in the Parquet schema
+STAGING_METADATA_KEY = b'catalog_import'
+
+class StagingService:
+    """Normalised imports staged as compressed Parquet files, so replays and
+    audits read typed columns without encoding detection or CSV parsing."""
+
+    DEFAULT_STAGING_DIR = "import_staging"
+    COMPRESSION = "zstd"
+
+    # Arrow types of the canonical catalog fields; other columns are staged as strings
+    FIELD_TYPES = {
+        field: pa.string() if isinstance(spec['dtype'], pd.StringDtype) else pa.from_numpy_dtype(spec['dtype'])
+        for field, spec in CATALOG_FEED_SCHEMA.items()
+    }
+
+    @staticmethod
+    def _to_arrow_table(df: pd.DataFrame) -> pa.Table:
+        """Convert a chunk to Arrow with a schema that depends only on its columns"""
+        columns = {}
+        for column in df.columns:
+            arrow_type = StagingService.FIELD_TYPES.get(column, pa.string())
+            if pa.types.is_floating(arrow_type):
+                values = pd.to_numeric(df[column], errors='coerce').astype('float64')
+            elif pa.types.is_integer(arrow_type):
+                values = pd.to_numeric(df[column], errors='coerce').astype('Int64')
+            else:
+                values = df[column] if isinstance(df[column].dtype, pd.StringDtype) else df[column].astype('string')
+            columns[str(column)] = pa.array(values, from_pandas=True).cast(arrow_type)
+        return pa.table(columns)
+
+    @staticmethod
+    def _pandas_type(arrow_type: pa.DataType):
+        """Read staged strings back as Arrow-backed pandas strings"""
+        return STRING_DTYPE if arrow_type == pa.string() else None
+
+    @staticmethod
+    def stage_chunks(chunks: Iterable[pd.DataFrame], source: str, metadata: Optional[Dict] = None,
+                     staging_dir: str = DEFAULT_STAGING_DIR) -> str:
+        """Write DataFrame chunks to one Parquet file and return its path"""
+        if not os.path.exists(staging_dir):
+            os.makedirs(staging_dir)
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        safe_source = re.sub(r'[^A-Za-z0-9_.-]', '_', source)
+        staging_path = os.path.join(staging_dir, f"{safe_source}_{timestamp}.parquet")
+        import_metadata = json.dumps({
+            'source': source,
+            'staged_at': datetime.utcnow().isoformat(),
+            **(metadata or {})
+        }, default=str).encode('utf-8')
+
+        writer = None
+        try:
+            for chunk in chunks:
+                table = StagingService._to_arrow_table(chunk)
+                if writer is None:
+                    schema = table.schema.with_metadata({STAGING_METADATA_KEY: import_metadata})
+                    writer = pq.ParquetWriter(staging_path, schema, compression=StagingService.COMPRESSION)
+                writer.write_table(table.replace_schema_metadata(writer.schema.metadata))
+
+            if writer is None:
+                # Keep a record of empty imports too
+                pq.write_table(
+                    pa.table({}).replace_schema_metadata({STAGING_METADATA_KEY: import_metadata}),
+                    staging_path
+                )
+            return staging_path
+
+        except Exception as e:
+            logging.error(f"Error staging import for {source}: {str(e)}")
+            raise
+        finally:
+            if writer is not None:
+                writer.close()
+
+    @staticmethod
+    def stage_dataframe(df: pd.DataFrame, source: str, metadata: Optional[Dict] = None,
+                        staging_dir: str = DEFAULT_STAGING_DIR) -> str:
+        """Write a single DataFrame to a staged Parquet file"""
+        return StagingService.stage_chunks([df], source, metadata, staging_dir)
+
+    @staticmethod
+    def read_staged_chunks(staging_path: str, chunk_size: int = CSV_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+        """Stream a staged import back as DataFrame chunks"""
+        parquet_file = pq.ParquetFile(staging_path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas(types_mapper=StagingService._pandas_type)
+
+    @staticmethod
+    def read_staged(staging_path: str) -> pd.DataFrame:
+        """Read a whole staged import"""
+        return pq.read_table(staging_path).to_pandas(types_mapper=StagingService._pandas_type)
+
+    @staticmethod
+    def read_staged_column(staging_path: str, column: str) -> List:
+        """Read one column of a staged import, None for every row when it is missing"""
+        parquet_file = pq.ParquetFile(staging_path)
+        if column not in parquet_file.schema_arrow.names:
+            return [None] * parquet_file.metadata.num_rows
+        return parquet_file.read(columns=[column]).column(column).to_pylist()
+
+    @staticmethod
+    def get_staged_metadata(staging_path: str) -> Dict:
+        """Get the source metadata and row count stored with a staged import"""
+        parquet_metadata = pq.read_metadata(staging_path)
+        schema_metadata = parquet_metadata.schema.to_arrow_schema().metadata or {}
+        metadata = json.loads(schema_metadata.get(STAGING_METADATA_KEY, b'{}'))
+        metadata['rows'] = parquet_metadata.num_rows
+        return metadata
+
+    @staticmethod
+    def list_staged_files(source: Optional[str] = None, staging_dir: str = DEFAULT_STAGING_DIR) -> List[str]:
+        """List staged imports, newest first, optionally for one source"""
+        paths = glob.glob(os.path.join(staging_dir, "*.parquet"))
+        if source:
+            paths = [path for path in paths if StagingService.get_staged_metadata(path).get('source') == source]
+        return sorted(paths, key=os.path.getmtime, reverse=True)
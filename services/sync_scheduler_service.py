@@ -1,6 +1,7 @@
 from models.database import SessionLocal, PlatformConnection, SyncSchedule, SyncLog, SyncDirection, ScheduleFrequency
 from datetime import datetime, timedelta
 from services.file_handling_service import FileHandlingService
+from services.staging_service import StagingService
 import pytz
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
@@ -125,24 +126,20 @@ class SyncSchedulerService:
             if platform.sync_direction == SyncDirection.IMPORT.value:
                 # Get data from Odoo
                 data = odoo_service.get_products()
+                df = self.file_handler.normalize_dataframe(data)
                 
-                # Save to temporary file
-                temp_file = "temp_odoo_import.csv"
-                data.to_csv(temp_file, index=False, encoding='utf-8-sig')
+                # Stage the normalised import as Parquet for replays and audits
+                file_date = datetime.utcnow()
+                staging_path = StagingService.stage_dataframe(
+                    df,
+                    source=f"odoo_{platform.id}",
+                    metadata={'file_date': file_date.isoformat(), 'sync_log_id': sync_log.id}
+                )
                 
-                # Process with file handler
-                df, encoding = self.file_handler.read_file_with_encoding(temp_file)
-                df = self.file_handler.normalize_dataframe(df)
-                
-                # Archive the import file
-                archive_path = self.file_handler.save_import_file(temp_file)
-                
-                # Get file date and update sync log
-                file_date = self.file_handler.get_file_date(temp_file)
+                # Update sync log
                 sync_log.import_metadata = {
                     'file_date': file_date.isoformat(),
-                    'encoding': encoding,
-                    'archive_path': archive_path
+                    'staging_path': staging_path
                 }
                 
                 # Process the data
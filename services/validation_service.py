@@ -1,8 +1,14 @@
-from models.database import SessionLocal, ValidationRule, ImportHistory, ImportRuleExecution, ArchivedProduct, Catalog
+from models.database import SessionLocal, WriterSessionLocal, ValidationRule, ImportHistory, ImportRuleExecution, ArchivedProduct, Catalog
+from services.bulk_import_service import BulkImportService
+from services.import_profile_service import ImportProfileService
+from services.import_index_service import ImportIndex
+from services.rule_engine_service import RuleEngine
+from services.catalog_stats_service import catalog_stats
+from sqlalchemy import Table, MetaData, Column, String, select, insert, update, and_, or_, literal
 from datetime import datetime, timedelta
 import re
 import logging
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Iterable, Union
 import pandas as pd
 
 class ValidationService:
@@ -75,10 +81,13 @@ class ValidationService:
         return True, barcode
 
     @staticmethod
-    def check_duplicate_barcode(db, barcode: str) -> bool:
-        """Check if barcode already exists"""
+    def check_duplicate_barcode(db, barcode: str, article_code: Optional[str] = None,
+                                index: Optional[ImportIndex] = None) -> bool:
+        """Check if barcode already exists, in memory when an import index is given"""
         if not barcode:
             return False
+        if index is not None:
+            return index.is_duplicate_barcode(barcode, article_code)
         count = db.query(Catalog).filter(Catalog.barcode == barcode).count()
         return count > 0
 
@@ -99,133 +108,276 @@ class ValidationService:
         return hours
 
     @staticmethod
-    def archive_missing_products(db, current_products: List[str], source: str):
-        """Archive products that are no longer in the import"""
+    def archive_missing_products(db, current_products: List[str], source: str) -> int:
+        """Archive products that are no longer in the import.
+
+        The imported article codes are staged in a temporary table so the
+        archive copy and the status change are two set-based statements.
+        Returns the number of archived products.
+        """
+        staged = Table(
+            "tmp_import_article_codes", MetaData(),
+            Column("article_code", String, primary_key=True),
+            prefixes=["TEMPORARY"]
+        )
         try:
-            # Get existing products from this source
-            existing_products = db.query(Catalog).filter(
+            connection = db.connection()
+            staged.drop(connection, checkfirst=True)
+            staged.create(connection)
+
+            codes = {code for code in current_products if code}
+            for chunk in BulkImportService.chunked(list(codes), BulkImportService.DEFAULT_CHUNK_SIZE):
+                db.execute(staged.insert(), [{"article_code": code} for code in chunk])
+
+            # Products without an article code can only match a row that had none either
+            missing = and_(
                 Catalog.source == source,
-                Catalog.status == 'active'
-            ).all()
-
-            # Find products to archive
-            for product in existing_products:
-                if product.article_code not in current_products:
-                    # Create archived product record
-                    archived = ArchivedProduct(
-                        original_id=product.id,
-                        reference=product.reference,
-                        article_code=product.article_code,
-                        name=product.name,
-                        barcode=product.barcode,
-                        description=product.description,
-                        price=product.price,
-                        stock_quantity=product.stock_quantity,
-                        purchase_price=product.purchase_price,
-                        last_seen=product.updated_at,
-                        archive_reason="missing from import",
-                        source_data=product.data
-                    )
-                    db.add(archived)
-                    
-                    # Update original product status
-                    product.status = 'archived'
-                    
+                Catalog.status == 'active',
+                or_(
+                    and_(Catalog.article_code.isnot(None),
+                         Catalog.article_code.notin_(select(staged.c.article_code))),
+                    and_(Catalog.article_code.is_(None), literal(None not in current_products))
+                )
+            )
+
+            # Create archived product records
+            db.execute(insert(ArchivedProduct).from_select(
+                ['original_id', 'reference', 'article_code', 'name', 'barcode', 'description', 'price',
+                 'stock_quantity', 'purchase_price', 'last_seen', 'archived_at', 'archive_reason', 'source_data'],
+                select(
+                    Catalog.id, Catalog.reference, Catalog.article_code, Catalog.name, Catalog.barcode,
+                    Catalog.description, Catalog.list_price, Catalog.stock_quantity, Catalog.purchase_price,
+                    Catalog.updated_at, literal(datetime.utcnow()), literal("missing from import"), Catalog.data
+                ).where(missing)
+            ))
+
+            # Update original product status
+            archived = db.execute(
+                update(Catalog).where(missing).values(status='archived')
+                .execution_options(synchronize_session=False)
+            ).rowcount
+
+            staged.drop(connection)
             db.commit()
-            
+            return archived
+
         except Exception as e:
             db.rollback()
             logging.error(f"Error archiving products: {str(e)}")
             raise
 
     @staticmethod
-    def process_import(df: pd.DataFrame, source: str, file_date: datetime) -> Tuple[bool, str, Dict]:
-        """Process data import with validation rules"""
-        db = SessionLocal()
+    def process_bulk_import(db, df: pd.DataFrame, source: str, stats: Dict,
+                            current_products: List[str], error_details: List[str],
+                            chunk_size: int = BulkImportService.DEFAULT_CHUNK_SIZE,
+                            index: Optional[ImportIndex] = None):
+        """Import a DataFrame chunk by chunk with set-based lookups and bulk writes.
+
+        Rows are folded and counted like process_row_import does, so both
+        paths report the same stats for the same feed.
+        """
+        records, rows = BulkImportService.fold_repeated(BulkImportService.dataframe_to_records(df))
+        index = index or ImportIndex.load(db, source)
+
+        for chunk in BulkImportService.chunked(list(zip(records, rows)), chunk_size):
+            chunk_rows = sum(row_count for _, row_count in chunk)
+            index.begin()
+            try:
+                with db.begin_nested():
+                    catalog_records = [BulkImportService.to_catalog_record(data, source) for data, _ in chunk]
+                    rows_of = {id(record): row_count for record, (_, row_count) in zip(catalog_records, chunk)}
+
+                    # Only article codes the index knows can match an existing product
+                    article_codes = list({
+                        r['article_code'] for r in catalog_records if index.has_article_code(r.get('article_code'))
+                    })
+                    existing = BulkImportService.load_existing_products(
+                        db, article_codes, source, chunk_size=chunk_size
+                    )
+
+                    inserts, candidates, unchanged = BulkImportService.classify_records(
+                        catalog_records, existing, index
+                    )
+                    # Only rows whose hash differs are compared column by column
+                    current = BulkImportService.load_products_by_id(
+                        db, [r['id'] for r in candidates], BulkImportService.HASHED_COLUMNS, chunk_size
+                    )
+                    changes = BulkImportService.changed_columns(candidates, current)
+                    BulkImportService.insert_records(db, inserts, chunk_size)
+                    BulkImportService.upsert_records(db, changes, chunk_size)
+
+                    # Folded rows count with their product; a new hash alone is no update
+                    candidates_by_id = {record['id']: record for record in candidates}
+                    created = sum(rows_of[id(record)] for record in inserts)
+                    updated = sum(
+                        rows_of[id(candidates_by_id[change['id']])] for change in changes
+                        if set(change) - {'id', 'content_hash'}
+                    )
+                    stats['created'] += created
+                    stats['updated'] += updated
+                    stats['unchanged'] += chunk_rows - created - updated
+                    stats['processed'] += chunk_rows
+                    current_products.extend(r.get('article_code') for r in catalog_records)
+                    for record in catalog_records:
+                        index.add_article_code(record.get('article_code'))
+                index.commit()
+
+            except Exception as e:
+                index.rollback()
+                stats['errors'] += chunk_rows
+                error_details.append(f"Chunk processing error: {str(e)}")
+
+    @staticmethod
+    def process_row_import(db, df: pd.DataFrame, source: str, stats: Dict,
+                           current_products: List[str], error_details: List[str],
+                           index: Optional[ImportIndex] = None):
+        """Import a DataFrame row by row through the ORM.
+
+        Rows repeating an article code are folded into their last occurrence
+        first (see BulkImportService.fold_repeated), so each product is
+        written once. Each product gets the same Catalog projection that its
+        content hash covers (see BulkImportService.to_catalog_record), inside
+        a savepoint so a failing row leaves no partial edits behind.
+        """
+        index = index or ImportIndex.load(db, source)
+        records, rows = BulkImportService.fold_repeated(BulkImportService.dataframe_to_records(df))
+        for data, row_count in zip(records, rows):
+            try:
+                article_code = data.get('article_code')
+
+                # Check for duplicate barcodes
+                if data.get('barcode'):
+                    if ValidationService.check_duplicate_barcode(db, data['barcode'], article_code, index):
+                        data['barcode'] = ''  # Clear duplicate barcode
+                    else:
+                        index.claim_barcode(data['barcode'], article_code)
+
+                # Hash the normalised content to skip rows unchanged since the last import
+                record = BulkImportService.to_catalog_record(data, source)
+                record['content_hash'] = BulkImportService.content_hash(record)
+
+                # Update or create product
+                existing_product = None
+                if index.has_article_code(article_code):
+                    existing_product = db.query(Catalog).filter(
+                        Catalog.source == source, Catalog.article_code == article_code
+                    ).order_by(Catalog.id).first()
+
+                if existing_product and existing_product.content_hash == record['content_hash']:
+                    stats['unchanged'] += row_count
+                elif existing_product:
+                    # Update the columns that differ; a new hash alone is no update, as in the bulk path
+                    stored = {column: getattr(existing_product, column) for column in BulkImportService.HASHED_COLUMNS}
+                    change = BulkImportService.changed_columns(
+                        [{**record, 'id': existing_product.id}], {existing_product.id: stored}
+                    )[0]
+                    changed = bool(set(change) - {'id', 'content_hash'})
+                    with db.begin_nested():
+                        for key, value in change.items():
+                            if key != 'id':
+                                setattr(existing_product, key, value)
+                        if changed:
+                            existing_product.updated_at = datetime.utcnow()
+                    stats['updated' if changed else 'unchanged'] += row_count
+                else:
+                    # Create new product
+                    with db.begin_nested():
+                        db.add(Catalog(**record))
+                    stats['created'] += row_count
+
+                index.add_article_code(article_code)
+                current_products.append(article_code)
+                stats['processed'] += row_count
+
+            except Exception as e:
+                stats['errors'] += row_count
+                error_details.append(f"Row processing error: {str(e)}")
+
+    @staticmethod
+    def process_import(df: Union[pd.DataFrame, Iterable[pd.DataFrame]], source: str, file_date: datetime,
+                       bulk: bool = False,
+                       chunk_size: int = BulkImportService.DEFAULT_CHUNK_SIZE,
+                       file_name: str = "import_file",
+                       archive_missing: bool = True,
+                       import_metadata: Optional[Dict] = None) -> Tuple[bool, str, Dict]:
+        """Process data import with validation rules
+
+        df may be a single DataFrame or an iterable of DataFrame chunks (see
+        FileHandlingService.read_file_chunks); each chunk is committed on its
+        own so memory stays bounded by the chunk size.
+
+        With bulk=True the rows are matched against the catalog with batched
+        IN (...) lookups and written with bulk upserts of chunk_size rows
+        instead of two queries per row.
+
+        Existing barcodes and article codes are loaded once into an
+        ImportIndex, so duplicate barcodes are detected without queries.
+        Active validation rules are compiled once into a RuleEngine that runs
+        over whole chunks; their hit counts are stored as ImportRuleExecution
+        rows.
+
+        archive_missing=False skips archiving the source's products that are
+        absent from this import, for feeds split across several files.
+
+        import_metadata (e.g. the detected CSV dialect) is stored with the
+        import statistics in the import history. When it describes the feed
+        header, the source's import profile is learned from it.
+
+        The import runs on the dedicated writer session (see
+        models.database.WriterSessionLocal), so concurrent imports queue.
+        """
+        db = WriterSessionLocal()
         try:
             # Create import history record
-            import_history = ValidationService.create_import_history(
+            import_history = db.merge(ValidationService.create_import_history(
                 source=source,
-                file_name="import_file",
+                file_name=file_name,
                 file_date=file_date
-            )
+            ))
 
             # Track statistics
             stats = {
-                'total': len(df),
+                'total': 0,
                 'processed': 0,
                 'errors': 0,
                 'updated': 0,
                 'created': 0,
+                'unchanged': 0,
                 'archived': 0
             }
 
-            # Get active rules
+            # Compile the active rules once for the whole import
             rules = db.query(ValidationRule).filter(
                 ValidationRule.is_active == True
             ).order_by(ValidationRule.priority).all()
+            engine, error_details = RuleEngine.compile(rules)
 
-            # Process each row
+            # Process each chunk
             current_products = []
-            error_details = []
-
-            for _, row in df.iterrows():
-                try:
-                    data = row.to_dict()
-                    modified_data = data.copy()
-
-                    # Apply validation rules
-                    for rule in rules:
-                        try:
-                            if rule.rule_type == "barcode":
-                                if "barcode" in modified_data:
-                                    is_valid, new_barcode = ValidationService.validate_barcode(modified_data["barcode"])
-                                    if not is_valid:
-                                        modified_data["barcode"] = new_barcode
-
-                            # Add more rule types here...
-                            
-                        except Exception as rule_error:
-                            error_details.append(f"Rule '{rule.name}' error: {str(rule_error)}")
-
-                    # Check for duplicate barcodes
-                    if modified_data.get('barcode') and ValidationService.check_duplicate_barcode(db, modified_data['barcode']):
-                        modified_data['barcode'] = ''  # Clear duplicate barcode
-
-                    # Calculate data freshness
-                    data_freshness = ValidationService.calculate_data_freshness(file_date)
-                    modified_data['data_freshness'] = data_freshness
-                    modified_data['data_timestamp'] = file_date
-                    modified_data['import_timestamp'] = datetime.utcnow()
-
-                    # Update or create product
-                    existing_product = None
-                    if modified_data.get('article_code'):
-                        existing_product = db.query(Catalog).filter(
-                            Catalog.article_code == modified_data['article_code']
-                        ).first()
-
-                    if existing_product:
-                        # Update existing product
-                        for key, value in modified_data.items():
-                            setattr(existing_product, key, value)
-                        existing_product.updated_at = datetime.utcnow()
-                        stats['updated'] += 1
-                    else:
-                        # Create new product
-                        new_product = Catalog(**modified_data)
-                        db.add(new_product)
-                        stats['created'] += 1
-
-                    current_products.append(modified_data.get('article_code'))
-                    stats['processed'] += 1
-
-                except Exception as e:
-                    stats['errors'] += 1
-                    error_details.append(f"Row processing error: {str(e)}")
+            index = ImportIndex.load(db, source)
+
+            frames = [df] if isinstance(df, pd.DataFrame) else df
+            for frame in frames:
+                stats['total'] += len(frame)
+                valid_frame, rejected_frame = engine.apply(frame)
+                stats['errors'] += len(rejected_frame)
+                if 'article_code' in rejected_frame.columns:
+                    # Rejected rows are still in the feed, so their products are not archived
+                    current_products.extend(rejected_frame['article_code'].dropna())
+                if bulk:
+                    ValidationService.process_bulk_import(
+                        db, valid_frame, source, stats, current_products, error_details, chunk_size, index
+                    )
+                else:
+                    ValidationService.process_row_import(
+                        db, valid_frame, source, stats, current_products, error_details, index
+                    )
+                # Commit per chunk so a streamed feed never holds more than one chunk
+                db.commit()
 
             # Archive missing products
-            ValidationService.archive_missing_products(db, current_products, source)
+            if archive_missing:
+                stats['archived'] = ValidationService.archive_missing_products(db, current_products, source)
 
             # Clean up old import history (keep last 5 days)
             cleanup_date = datetime.utcnow() - timedelta(days=5)
@@ -239,9 +391,26 @@ class ValidationService:
             import_history.processed_records = stats['processed']
             import_history.error_records = stats['errors']
             import_history.error_details = {'errors': error_details}
-            import_history.import_metadata = stats
+            import_history.import_metadata = {**(import_metadata or {}), **stats}
+            for execution in engine.executions(import_history.id):
+                db.add(ImportRuleExecution(**execution))
+            for rule in engine.rules:
+                if engine.rejected[rule.rule_id]:
+                    error_details.append(f"Rule '{rule.name}' rejected {engine.rejected[rule.rule_id]} rows")
 
             db.commit()
+            catalog_stats.invalidate()
+
+            # Learn the source's import profile from this successful import
+            if import_metadata and import_metadata.get('header'):
+                ImportProfileService.save_profile(
+                    source,
+                    import_metadata['header'],
+                    import_metadata.get('dialect'),
+                    import_metadata.get('dtypes'),
+                    import_metadata.get('column_mapping'),
+                    file_name
+                )
             
             return True, "Import completed successfully", stats
 
@@ -0,0 +1,27 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# models.database reads the URL at import time, so point it at a scratch database first
+_database_dir = tempfile.mkdtemp(prefix="catalog-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_database_dir, 'catalog.db')}"
+
+
+@pytest.fixture
+def db_tables():
+    """A migrated database with empty catalog and import tables"""
+    from models.database import init_db, SessionLocal, Catalog, ArchivedProduct, ImportHistory, ImportProfile
+
+    init_db()
+    db = SessionLocal()
+    try:
+        for model in (ArchivedProduct, ImportHistory, ImportProfile, Catalog):
+            db.query(model).delete()
+        db.commit()
+    finally:
+        db.close()
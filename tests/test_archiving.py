@@ -0,0 +1,40 @@
+from models.database import SessionLocal, Catalog
+from services.validation_service import ValidationService
+
+
+def _statuses(db):
+    return {(product.article_code, product.name): product.status for product in db.query(Catalog)}
+
+
+def test_products_without_article_code_survive_a_feed_without_codes(db_tables):
+    db = SessionLocal()
+    try:
+        db.add_all([
+            Catalog(source='S', name='a', status='active'),
+            Catalog(source='S', name='b', status='active'),
+            Catalog(source='S', article_code='A1', name='c', status='active'),
+        ])
+        db.commit()
+
+        # Every row of the feed lacked an article code
+        archived = ValidationService.archive_missing_products(db, [None, None], 'S')
+
+        assert archived == 1
+        assert _statuses(db) == {(None, 'a'): 'active', (None, 'b'): 'active', ('A1', 'c'): 'archived'}
+    finally:
+        db.close()
+
+
+def test_products_without_article_code_are_archived_when_the_feed_has_none(db_tables):
+    db = SessionLocal()
+    try:
+        db.add_all([
+            Catalog(source='S', name='a', status='active'),
+            Catalog(source='S', article_code='A1', name='c', status='active'),
+        ])
+        db.commit()
+
+        assert ValidationService.archive_missing_products(db, ['A1'], 'S') == 1
+        assert _statuses(db) == {(None, 'a'): 'archived', ('A1', 'c'): 'active'}
+    finally:
+        db.close()
@@ -0,0 +1,47 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from services.validation_service import ValidationService
+
+
+def _feed(price_a1='1'):
+    return pd.DataFrame([
+        {'article_code': 'A1', 'name': 'Chaise', 'price': price_a1, 'barcode': '3560070894222'},
+        {'article_code': 'A2', 'name': 'Table', 'price': '2', 'barcode': None},
+        {'article_code': 'A3', 'name': 'Lampe', 'price': '3', 'barcode': None},
+        {'article_code': 'A2', 'name': 'Table XL', 'price': '5', 'barcode': None},
+        {'article_code': None, 'name': 'Sans code', 'price': '4', 'barcode': None},
+    ])
+
+
+def _import(df, source, bulk):
+    # Bulk chunks of 2 rows put the repeated A2 rows in different chunks
+    success, message, stats = ValidationService.process_import(
+        df, source, datetime.utcnow(), bulk=bulk, chunk_size=2, archive_missing=False
+    )
+    assert success, message
+    return stats
+
+
+@pytest.mark.parametrize('feeds', [
+    [_feed(), _feed()],
+    [_feed(), _feed(price_a1='9')],
+])
+def test_bulk_and_row_paths_report_the_same_stats(db_tables, feeds):
+    for df in feeds:
+        row_stats = _import(df.copy(), 'ROW', bulk=False)
+        bulk_stats = _import(df.copy(), 'BULK', bulk=True)
+        assert row_stats == bulk_stats
+        assert row_stats['processed'] == len(df)
+        assert row_stats['created'] + row_stats['updated'] + row_stats['unchanged'] == len(df)
+
+
+def test_repeated_article_code_is_unchanged_on_reimport(db_tables):
+    for bulk in (False, True):
+        source = f'S{bulk}'
+        _import(_feed(), source, bulk)
+        stats = _import(_feed(), source, bulk)
+        # Only the row without article code cannot be matched to its product
+        assert (stats['created'], stats['updated'], stats['unchanged']) == (1, 0, 4)
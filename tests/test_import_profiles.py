@@ -0,0 +1,32 @@
+from services.import_profile_service import ImportProfileService
+from utils.processors import sniff_file_dialect
+
+
+def _write(path, text, encoding='utf-8'):
+    path.write_bytes(text.encode(encoding))
+    return str(path)
+
+
+def test_file_pattern_masks_dates_but_not_part_numbers():
+    assert ImportProfileService.file_pattern('/feeds/tarif_20241017.csv') == 'tarif_#.csv'
+    assert ImportProfileService.file_pattern('part1.csv') != ImportProfileService.file_pattern('part2.csv')
+
+
+def test_stale_profile_is_skipped_and_each_file_keeps_its_own(db_tables, tmp_path):
+    f1 = _write(tmp_path / 'f1.csv', 'Tarif été\nExport\nref;nom\nA1;Chaise\n', 'latin-1')
+    f2 = _write(tmp_path / 'f2.csv', 'ref;nom\nA2;Table\n')
+    for path, name in ((f1, 'f1.csv'), (f2, 'f2.csv')):
+        assert ImportProfileService.save_profile(
+            'FEED', ['ref', 'nom'], sniff_file_dialect(path).to_dict(), {}, {'ref': 'article_code'}, name
+        )
+
+    profiles = ImportProfileService.get_profiles('FEED')
+    assert {profile['file_pattern'] for profile in profiles} == {'f1.csv', 'f2.csv'}
+    assert {profile['key_column'] for profile in profiles} == {'ref'}
+
+    profile, dialect, _ = ImportProfileService.match_dialect(profiles, f2, 'f2.csv')
+    assert profile['file_pattern'] == 'f2.csv' and dialect.header_row == 0
+
+    # f1's profile alone (header_row=2) cannot read f2's header: sniff instead of failing
+    f1_profile = [profile for profile in profiles if profile['file_pattern'] == 'f1.csv']
+    assert ImportProfileService.match_dialect(f1_profile, f2, 'f2.csv') == (None, None, {})
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from sqlalchemy import create_engine, text
+
+from models.database import Base
+from models.migrations import schema_migrations, upgrade
+
+
+def test_catalog_index_migration_archives_duplicates(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    Base.metadata.create_all(engine)
+    schema_migrations.create(engine)
+    with engine.begin() as connection:
+        # A database from before revision 0003: no unique indexes, duplicated products
+        connection.execute(text("DROP INDEX uq_catalogs_source_article_code"))
+        connection.execute(text("DROP INDEX uq_catalogs_source_source_id"))
+        for revision in ("0001", "0002"):
+            connection.execute(schema_migrations.insert().values(revision=revision, applied_at=datetime.utcnow()))
+        connection.execute(text(
+            "INSERT INTO catalogs (id, source, article_code, name, updated_at) VALUES "
+            "(1, 'S', 'A1', 'old', '2024-01-01 00:00:00'), "
+            "(2, 'S', 'A1', 'new', '2024-06-01 00:00:00'), "
+            "(3, 'T', 'A1', 'other source', '2024-01-01 00:00:00'), "
+            "(4, 'S', NULL, 'no code', NULL), (5, 'S', NULL, 'no code', NULL)"
+        ))
+        connection.execute(text("INSERT INTO product_enrichments (id, catalog_id) VALUES (1, 1)"))
+
+    assert upgrade(engine)[0] == "0003"
+
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT id FROM catalogs ORDER BY id")).scalars().all() == [2, 3, 4, 5]
+        assert connection.execute(text(
+            "SELECT original_id, archive_reason FROM archived_products"
+        )).all() == [(1, "duplicate (source, article_code)")]
+        assert connection.execute(text("SELECT catalog_id FROM product_enrichments")).scalar() == 2
@@ -0,0 +1,41 @@
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from utils import processors
+from utils.processors import iter_excel_chunks, standardize_catalog_data
+
+
+@pytest.fixture
+def xlsx_path(tmp_path):
+    path = tmp_path / "feed.xlsx"
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["article_code", "barcode", "list_price", "stock_quantity", "name"])
+    sheet.append([1001, 3560070894222, 12.5, 3, "Chaise"])
+    sheet.append([1002, 3560070894239, 7, 0, None])
+    workbook.save(path)
+    return str(path)
+
+
+def _read(path):
+    return pd.concat(list(iter_excel_chunks(path)), ignore_index=True)
+
+
+def test_calamine_and_openpyxl_read_the_same_values(xlsx_path, monkeypatch):
+    pytest.importorskip("python_calamine")
+    calamine = _read(xlsx_path)
+    monkeypatch.setattr(processors, "CalamineWorkbook", None)
+    openpyxl = _read(xlsx_path)
+
+    pd.testing.assert_frame_equal(calamine, openpyxl)
+    assert calamine.iloc[0].tolist() == [1001, 3560070894222, 12.5, 3, "Chaise"]
+
+
+def test_calamine_integers_survive_standardisation(xlsx_path):
+    pytest.importorskip("python_calamine")
+    df = standardize_catalog_data(_read(xlsx_path))
+
+    assert df.loc[0, "article_code"] == "1001"
+    assert df.loc[0, "barcode"] == "3560070894222"
+    assert df.loc[0, "stock_quantity"] == 3
@@ -0,0 +1,166 @@
+import os
+import socket
+import threading
+import time
+
+import paramiko
+import pytest
+
+import services.ftp_service as ftp_service
+from services.ftp_connection_pool import FTPConnectionPool
+from services.ftp_service import FTPService
+
+
+class _StubServer(paramiko.ServerInterface):
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_channel_request(self, kind, chanid):
+        return paramiko.OPEN_SUCCEEDED
+
+
+class _StubSFTP(paramiko.SFTPServerInterface):
+    """Read-only SFTP view of a local directory"""
+
+    root = None
+
+    def canonicalize(self, path):
+        return os.path.normpath(path if path.startswith('/') else '/' + path)
+
+    def _local(self, path):
+        return os.path.join(self.root, self.canonicalize(path).lstrip('/'))
+
+    def stat(self, path):
+        return paramiko.SFTPAttributes.from_stat(os.stat(self._local(path)))
+
+    lstat = stat
+
+    def open(self, path, flags, attr):
+        handle = paramiko.SFTPHandle(flags)
+        handle.readfile = open(self._local(path), 'rb')
+        return handle
+
+
+@pytest.fixture(scope='module')
+def sftp_server(tmp_path_factory):
+    """An in-process SFTP server serving a temp directory; yields (port, root)"""
+    root = str(tmp_path_factory.mktemp('sftp-root'))
+    host_key = paramiko.RSAKey.generate(2048)
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(20)
+    transports = []
+
+    def serve():
+        while True:
+            try:
+                client, _ = listener.accept()
+            except OSError:
+                return
+            transport = paramiko.Transport(client)
+            transport.add_server_key(host_key)
+            transport.set_subsystem_handler('sftp', paramiko.SFTPServer, _StubSFTP)
+            transport.start_server(server=_StubServer())
+            transports.append(transport)
+
+    _StubSFTP.root = root
+    threading.Thread(target=serve, daemon=True).start()
+    yield listener.getsockname()[1], root
+    listener.close()
+    for transport in transports:
+        transport.close()
+
+
+@pytest.fixture
+def remote_file(sftp_server, monkeypatch):
+    """A remote file of four minimum-size segments plus a tail; small sizes keep the test fast"""
+    monkeypatch.setattr(ftp_service, 'MIN_SEGMENT_SIZE', 64 * 1024)
+    monkeypatch.setattr(ftp_service, 'SEGMENT_WINDOW_SIZE', 32 * 1024)
+    _, root = sftp_server
+    content = os.urandom(4 * 64 * 1024 + 1234)
+    with open(os.path.join(root, 'catalog.csv'), 'wb') as file:
+        file.write(content)
+    return content
+
+
+@pytest.fixture
+def readv_calls(monkeypatch):
+    calls = []
+    readv = paramiko.SFTPFile.readv
+
+    def counting_readv(self, chunks, *args, **kwargs):
+        calls.append(len(chunks))
+        return readv(self, chunks, *args, **kwargs)
+
+    monkeypatch.setattr(paramiko.SFTPFile, 'readv', counting_readv)
+    return calls
+
+
+def _download(service, tmp_path, segments=4):
+    local_path = str(tmp_path / 'catalog.csv')
+    success, path, message = service.download_segmented('catalog.csv', local_path, segments=segments)
+    assert success, message
+    with open(path, 'rb') as file:
+        return file.read(), message
+
+
+def test_segmented_download_reads_ranges_with_readv(sftp_server, remote_file, readv_calls, tmp_path):
+    port, _ = sftp_server
+    pool = FTPConnectionPool(max_per_host=4)
+    service = FTPService('127.0.0.1', 'user', 'secret', port=port, use_sftp=True, pool=pool)
+    assert service.connect()[0]
+    try:
+        content, message = _download(service, tmp_path)
+    finally:
+        service.disconnect()
+        pool.close_all()
+
+    assert content == remote_file
+    assert message.endswith('in 4 segments')
+    # Segments larger than the window are read as several readv batches
+    assert len(readv_calls) > 4
+    assert pool.get_stats()['leased'] == 0
+
+
+def test_segmented_download_without_pool_uses_channels(sftp_server, remote_file, tmp_path):
+    port, _ = sftp_server
+    service = FTPService('127.0.0.1', 'user', 'secret', port=port, use_sftp=True)
+    assert service.connect()[0]
+    try:
+        content, message = _download(service, tmp_path, segments=2)
+    finally:
+        service.disconnect()
+
+    assert content == remote_file
+    assert message.endswith('in 2 segments')
+
+
+@pytest.mark.parametrize('held_elsewhere, expected_segments', [(0, 3), (1, 2), (2, 1)])
+def test_segmented_download_uses_only_free_leases(sftp_server, remote_file, tmp_path,
+                                                  held_elsewhere, expected_segments):
+    port, _ = sftp_server
+    # A segment waiting for a lease would block for the whole acquire timeout
+    pool = FTPConnectionPool(max_per_host=3, acquire_timeout=30)
+    others = [
+        FTPService('127.0.0.1', f'other{index}', 'secret', port=port, use_sftp=True, pool=pool)
+        for index in range(held_elsewhere)
+    ]
+    service = FTPService('127.0.0.1', 'user', 'secret', port=port, use_sftp=True, pool=pool)
+    for connected in others + [service]:
+        assert connected.connect()[0]
+    try:
+        started = time.monotonic()
+        content, message = _download(service, tmp_path)
+        elapsed = time.monotonic() - started
+    finally:
+        for connected in others + [service]:
+            connected.disconnect()
+        pool.close_all()
+
+    assert content == remote_file
+    assert message.endswith(f'in {expected_segments} segments')
+    assert elapsed < 10
+    assert pool.get_stats()['leased'] == 0
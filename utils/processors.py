@@ -1,95 +1,323 @@
 import pandas as pd
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Iterator, Optional
+import codecs
 import hashlib
 import io
+import os
 import re
 import csv
 
-def read_csv_file(file) -> Tuple[pd.DataFrame, bool, str]:
-    """Read CSV file without validation, trying different encodings and parsing options"""
-    encodings = ['utf-8', 'latin-1', 'cp1252']
-    
-    for encoding in encodings:
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+    pc = None
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:
+    CalamineWorkbook = None
+
+# Rows per DataFrame yielded by the streaming CSV reader
+CSV_CHUNK_SIZE = 50000
+
+# Bytes inspected to pick the encoding and delimiter of a streamed CSV
+CSV_SAMPLE_SIZE = 64 * 1024
+CSV_SNIFF_LINES = 50
+CSV_DELIMITERS = ',;\t|'
+
+# File signatures: XLSX is a zip archive, XLS an OLE2 compound document
+XLSX_MAGIC = b'PK\x03\x04'
+XLS_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+
+class CSVDialect:
+    """How a CSV feed is written: encoding, delimiter, quote character and
+    the number of preamble lines before the header row"""
+
+    def __init__(self, encoding: str = 'utf-8', delimiter: str = ',', quotechar: str = '"', header_row: int = 0):
+        # An ASCII sample says nothing about the rest of the feed, which utf-8 also decodes
+        self.encoding = 'utf-8' if (encoding or '').lower() in ('ascii', 'us-ascii') else encoding
+        self.delimiter = delimiter
+        self.quotechar = quotechar
+        self.header_row = header_row
+
+    def to_dict(self) -> Dict:
+        return {
+            'encoding': self.encoding,
+            'delimiter': self.delimiter,
+            'quotechar': self.quotechar,
+            'header_row': self.header_row
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'CSVDialect':
+        return cls(**{key: data[key] for key in ('encoding', 'delimiter', 'quotechar', 'header_row') if key in data})
+
+    def read_csv_kwargs(self) -> Dict:
+        """Arguments driving pd.read_csv with this dialect"""
+        return {
+            'encoding': self.encoding,
+            'sep': self.delimiter,
+            'quotechar': self.quotechar,
+            'skiprows': self.header_row or None
+        }
+
+    def __repr__(self) -> str:
+        return f"CSVDialect({self.to_dict()})"
+
+def read_csv_file(file, dialect: Optional[CSVDialect] = None,
+                  dtype: Optional[Dict[str, str]] = None) -> Tuple[pd.DataFrame, bool, str]:
+    """Read CSV file without validation in a single pass.
+
+    The dialect (encoding, delimiter, quote character, header row) is sniffed
+    from the first block unless a known dialect is given.
+    """
+    try:
+        if dialect is None:
+            sample, file = _read_sample(file)
+            dialect = sniff_csv_dialect(sample)
+        df = pd.read_csv(
+            file,
+            encoding_errors='replace',
+            on_bad_lines='skip',
+            dtype=dtype,
+            **dialect.read_csv_kwargs()
+        )
+        return df, True, "CSV read successfully"
+    except Exception as e:
+        return pd.DataFrame(), False, f"Unable to read CSV: {str(e)}"
+
+class _PrefixedStream(io.RawIOBase):
+    """Forward-only stream that replays an already read prefix before the rest"""
+
+    def __init__(self, prefix: bytes, stream):
+        self.prefix = prefix
+        self.stream = stream
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self.prefix:
+            size = min(len(buffer), len(self.prefix))
+            buffer[:size] = self.prefix[:size]
+            self.prefix = self.prefix[size:]
+            return size
+        data = self.stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+def _read_sample(file, size: int = CSV_SAMPLE_SIZE) -> Tuple[bytes, object]:
+    """Read the first bytes of a CSV source without consuming it.
+
+    Returns the sample and the source to parse, which for forward-only
+    streams (sockets, remote files) is a wrapper replaying the sample.
+    """
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, 'rb') as f:
+            return f.read(size), file
+
+    if getattr(file, 'seekable', lambda: False)():
+        position = file.tell()
+        sample = file.read(size)
+        file.seek(position)
+        return (sample if isinstance(sample, bytes) else sample.encode('utf-8')), file
+
+    blocks, remaining = [], size
+    while remaining > 0:
+        block = file.read(remaining)
+        if not block:
+            break
+        blocks.append(block)
+        remaining -= len(block)
+    sample = b''.join(blocks)
+    return sample, io.BufferedReader(_PrefixedStream(sample, file))
+
+def sniff_csv_dialect(sample: bytes, encodings: List[str] = None) -> CSVDialect:
+    """Detect the dialect of a CSV file from its first block.
+
+    The first candidate encoding that decodes the block wins. The delimiter
+    is the one giving the most lines the same field count, and the header
+    row is the first line with that count, so preamble lines (supplier
+    name, export date) are skipped. header_row counts every line of the
+    file before the header, blank ones included, as pd.read_csv skiprows does.
+    """
+    encodings = encodings or ['utf-8', 'latin-1', 'cp1252']
+    if sample.startswith(codecs.BOM_UTF8):
+        encodings = ['utf-8-sig'] + [encoding for encoding in encodings if encoding != 'utf-8']
+    encoding, text = encodings[-1], ''
+    for candidate in encodings:
         try:
-            # Try different CSV parsing options
-            try:
-                # First try: standard reading
-                df = pd.read_csv(
-                    file, 
-                    encoding=encoding,
-                    encoding_errors='replace',
-                    on_bad_lines='skip',
-                    low_memory=False
-                )
-                return df, True, "CSV read successfully"
-            except:
-                # Second try: with different separator
-                file.seek(0)
-                df = pd.read_csv(
-                    file,
-                    encoding=encoding,
-                    encoding_errors='replace',
-                    on_bad_lines='skip',
-                    sep=';',
-                    low_memory=False
-                )
-                return df, True, "CSV read successfully"
-            
+            # Incremental decode so a multibyte char cut at the block edge is not an error
+            text = codecs.getincrementaldecoder(candidate)().decode(sample, final=False)
+            encoding = candidate
+            break
         except UnicodeDecodeError:
             continue
-        except Exception as e:
-            # Try manual reading for problematic files
-            try:
-                file.seek(0)
-                # Read file content
-                content = file.read().decode(encoding)
-                # Split into lines
-                lines = content.split('\n')
-                if not lines:
-                    continue
-                
-                # Detect delimiter
-                sniffer = csv.Sniffer()
-                dialect = sniffer.sniff(lines[0])
-                delimiter = dialect.delimiter
-                
-                # Parse manually
-                data = []
-                headers = None
-                for line in lines:
-                    if not line.strip():
-                        continue
-                    row = line.split(delimiter)
-                    if headers is None:
-                        headers = [h.strip() for h in row]
-                    else:
-                        # Ensure row has same length as headers
-                        while len(row) < len(headers):
-                            row.append('')
-                        data.append(dict(zip(headers, [cell.strip() for cell in row[:len(headers)]])))
-                
-                if data:
-                    df = pd.DataFrame(data)
-                    return df, True, "CSV read successfully with manual parsing"
-                
-            except Exception as manual_error:
-                continue
-    
-    return pd.DataFrame(), False, "Unable to read CSV with any supported encoding or format"
+    if not text:
+        text = sample.decode(encoding, errors='replace')
+
+    # Drop the last line, which the block boundary may have cut
+    lines = re.split(r'\r\n|\r|\n', text)
+    if len(lines) > 1 and not text.endswith(('\n', '\r')):
+        lines = lines[:-1]
+    # Blank lines are not scored but still count in the header row number
+    line_numbers = [number for number, line in enumerate(lines) if line.strip()][:CSV_SNIFF_LINES]
+    if not line_numbers:
+        return CSVDialect(encoding=encoding)
+
+    lines = [lines[number] for number in line_numbers]
+    try:
+        quotechar = "'" if csv.Sniffer().sniff('\n'.join(lines), delimiters=CSV_DELIMITERS).quotechar == "'" else '"'
+    except csv.Error:
+        quotechar = '"'
+
+    # The delimiter splitting the most lines into the same number of fields wins;
+    # unlike csv.Sniffer this is not fooled by decimal commas or preamble lines
+    delimiter, best_score, header_row = ',', (0, 0), 0
+    for candidate in CSV_DELIMITERS:
+        field_counts = [len(row) for row in csv.reader(lines, delimiter=candidate, quotechar=quotechar)]
+        multi_field = [count for count in field_counts if count > 1]
+        if not multi_field:
+            continue
+        usual = max(set(multi_field), key=multi_field.count)
+        score = (multi_field.count(usual), usual)
+        if score > best_score:
+            delimiter, best_score = candidate, score
+            header_row = line_numbers[next(index for index, count in enumerate(field_counts) if count == usual)]
+
+    return CSVDialect(encoding=encoding, delimiter=delimiter, quotechar=quotechar, header_row=header_row)
+
+def sniff_file_dialect(file, encodings: List[str] = None) -> CSVDialect:
+    """Detect the dialect of a CSV path or seekable file object from its first block"""
+    sample, _ = _read_sample(file)
+    return sniff_csv_dialect(sample, encodings)
+
+def read_csv_header(file, dialect: CSVDialect) -> List[str]:
+    """Read only the column names of a CSV path or seekable file object"""
+    position = None if isinstance(file, (str, os.PathLike)) else file.tell()
+    try:
+        return [str(column) for column in pd.read_csv(
+            file, nrows=0, encoding_errors='replace', **dialect.read_csv_kwargs()
+        ).columns]
+    finally:
+        if position is not None:
+            file.seek(position)
+
+def iter_csv_chunks(file, chunk_size: int = CSV_CHUNK_SIZE, encoding: Optional[str] = None,
+                    sep: Optional[str] = None, dialect: Optional[CSVDialect] = None,
+                    dtype: Optional[Dict[str, str]] = None) -> Iterator[pd.DataFrame]:
+    """Stream a CSV file as DataFrames of at most chunk_size rows.
+
+    The dialect is decided once from the first block, or taken as given, so
+    memory stays bounded by the chunk size rather than the file size. file
+    may be a path, a seekable file object or a forward-only binary stream.
+    encoding and sep override the sniffed values.
+    """
+    if dialect is None:
+        sample, file = _read_sample(file)
+        dialect = sniff_csv_dialect(sample, [encoding] if encoding else None)
+    read_kwargs = dialect.read_csv_kwargs()
+    if encoding:
+        read_kwargs['encoding'] = encoding
+    if sep:
+        read_kwargs['sep'] = sep
+
+    reader = pd.read_csv(
+        file,
+        encoding_errors='replace',
+        on_bad_lines='skip',
+        chunksize=chunk_size,
+        dtype=dtype,
+        **read_kwargs
+    )
+    with reader:
+        for chunk in reader:
+            yield chunk
+
+def detect_file_format(file) -> str:
+    """Detect 'xlsx', 'xls' or 'csv' from the first bytes of a path or seekable file object"""
+    sample, _ = _read_sample(file, len(XLS_MAGIC))
+    if sample.startswith(XLSX_MAGIC):
+        return 'xlsx'
+    if sample.startswith(XLS_MAGIC):
+        return 'xls'
+    return 'csv'
+
+def _excel_header(values) -> List[str]:
+    """Column names as pandas would build them: blanks unnamed, duplicates numbered"""
+    header, seen = [], {}
+    for index, value in enumerate(values):
+        name = f"Unnamed: {index}" if value is None or str(value).strip() == '' else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        header.append(name)
+    return header
+
+def _iter_excel_rows(file, file_format: str, sheet: int = 0) -> Iterator[tuple]:
+    """Iterate the rows of a worksheet as tuples of cell values without loading the workbook"""
+    if CalamineWorkbook is not None:
+        workbook = CalamineWorkbook.from_path(file) if isinstance(file, (str, os.PathLike)) \
+            else CalamineWorkbook.from_filelike(file)
+        for row in workbook.get_sheet_by_index(sheet).iter_rows():
+            # calamine reads every number as a float; keep integral ones int, as pandas does
+            yield tuple(int(value) if isinstance(value, float) and value.is_integer() else value for value in row)
+        return
+
+    if file_format == 'xls':
+        # Legacy binary format: without calamine only xlrd reads it, and only as a whole
+        df = pd.read_excel(file, engine='xlrd', sheet_name=sheet, header=None)
+        yield from df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+        return
+
+    from openpyxl import load_workbook
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        worksheet = workbook.worksheets[sheet]
+        # Some generators write a wrong dimension tag, which would cut read-only iteration short
+        worksheet.reset_dimensions()
+        yield from worksheet.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+def iter_excel_chunks(file, chunk_size: int = CSV_CHUNK_SIZE, sheet: int = 0) -> Iterator[pd.DataFrame]:
+    """Stream an Excel sheet as DataFrames of at most chunk_size rows.
+
+    Uses calamine when installed, else openpyxl in read-only mode, so rows
+    are read one at a time instead of materialising the whole workbook. The
+    first non-blank row is the header; blank rows and cells beyond the header
+    are skipped.
+    """
+    header = None
+    rows = []
+    for values in _iter_excel_rows(file, detect_file_format(file), sheet):
+        # calamine reports empty cells as '', openpyxl as None
+        values = [None if isinstance(value, str) and value == '' else value for value in values]
+        if all(value is None for value in values):
+            continue
+        if header is None:
+            header = _excel_header(values)
+            continue
+        rows.append(values[:len(header)] + [None] * (len(header) - len(values)))
+        if len(rows) >= chunk_size:
+            yield pd.DataFrame(rows, columns=header)
+            rows = []
+
+    if rows:
+        yield pd.DataFrame(rows, columns=header)
 
 def read_excel_file(file) -> Tuple[pd.DataFrame, bool, str]:
     """Read Excel file (XLS/XLSX) without validation"""
     try:
-        # Try reading as XLSX first
-        df = pd.read_excel(file, engine='openpyxl')
+        chunks = list(iter_excel_chunks(file))
+        df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
         return df, True, "Excel file read successfully"
-    except Exception as xlsx_error:
-        try:
-            # If XLSX fails, try XLS format
-            df = pd.read_excel(file, engine='xlrd')
-            return df, True, "Excel file read successfully"
-        except Exception as xls_error:
-            return pd.DataFrame(), False, f"Error reading Excel file: {str(xlsx_error)}"
+    except Exception as e:
+        return pd.DataFrame(), False, f"Error reading Excel file: {str(e)}"
 
 def clean_price(value) -> float:
     """Clean price value to extract only numbers"""
@@ -119,23 +347,108 @@ def clean_quantity(value) -> int:
     except:
         return 0
 
-def process_file(file, file_type: str, column_mapping: Dict[str, str] = None) -> Tuple[pd.DataFrame, bool, str]:
-    """Process uploaded file (CSV or Excel) with validation and encoding handling"""
+def _to_arrow_strings(series: pd.Series):
+    """Get a series as an Arrow string array, without a copy when it is already Arrow-backed"""
+    if isinstance(series.dtype, pd.StringDtype) and series.dtype.storage != 'python':
+        array = pa.array(series)
+        array = array.combine_chunks() if isinstance(array, pa.ChunkedArray) else array
+        # pandas stores large_string; the kernels used here expect plain string offsets
+        return array.cast(pa.string())
+    return pa.array(series.astype(str).to_numpy(dtype=object), type=pa.string())
+
+def clean_price_series(series: pd.Series) -> pd.Series:
+    """Vectorised clean_price: same float values, without a Python call per cell"""
+    missing = series.isna() | series.isin(['', 'NC'])
+
+    if pc is not None:
+        # Arrow runs the regex passes and the correctly rounded float parse in C++
+        cleaned = pc.replace_substring_regex(_to_arrow_strings(series), r'[^0-9,.]', '')
+        cleaned = pc.replace_substring(cleaned, ',', '.')
+        # If multiple dots exist, keep only the first one
+        multi_dot = pc.greater(pc.count_substring(cleaned, '.'), 1)
+        if pc.any(multi_dot).as_py():
+            parts = pc.extract_regex(pc.filter(cleaned, multi_dot), r'^(?P<head>[^.]*\.)(?P<tail>.*)$')
+            fixed = pc.binary_join_element_wise(
+                parts.field('head'), pc.replace_substring(parts.field('tail'), '.', ''), ''
+            )
+            cleaned = pc.replace_with_mask(cleaned, multi_dot, fixed)
+        invalid = pc.or_kleene(pa.array(missing.to_numpy()), pc.is_in(cleaned, pa.array(['', '.'])))
+        cleaned = pc.if_else(invalid, '0', cleaned)
+        values = pc.cast(cleaned, pa.float64()).to_numpy(zero_copy_only=False)
+    else:
+        text = series.astype(str)
+        cleaned = text.str.replace(r'[^0-9,.]', '', regex=True).str.replace(',', '.', regex=False)
+        # If multiple dots exist, keep only the first one
+        cleaned = cleaned.str.replace(r'\.\d*\.[\d.]*', lambda m: '.' + m.group(0)[1:].replace('.', ''), regex=True)
+        cleaned = cleaned.mask(missing | cleaned.isin(['', '.']), '0')
+        # object -> float64 goes through float() per value, exactly like clean_price
+        values = cleaned.to_numpy(dtype=object).astype('float64')
+
+    return pd.Series(values, index=series.index, name=series.name)
+
+def clean_quantity_series(series: pd.Series) -> pd.Series:
+    """Vectorised clean_quantity: same int values, without a Python call per cell"""
+    missing = series.isna() | series.isin(['', 'NC'])
+
+    try:
+        if pc is not None:
+            cleaned = pc.replace_substring_regex(_to_arrow_strings(series), r'[^0-9]', '')
+            invalid = pc.or_kleene(pa.array(missing.to_numpy()), pc.equal(cleaned, ''))
+            values = pc.cast(pc.if_else(invalid, '0', cleaned), pa.int64()).to_numpy(zero_copy_only=False)
+        else:
+            cleaned = series.astype(str).str.replace(r'[^0-9]', '', regex=True)
+            cleaned = cleaned.mask(missing | (cleaned == ''), '0')
+            values = cleaned.to_numpy(dtype=object).astype('int64')
+    except (OverflowError, ValueError):
+        # Quantities beyond int64 keep the per-cell Python int behaviour
+        return series.apply(clean_quantity)
+
+    return pd.Series(values, index=series.index, name=series.name)
+
+def process_file(file, file_type: str, column_mapping: Dict[str, str] = None,
+                 source: Optional[str] = None) -> Tuple[pd.DataFrame, bool, str]:
+    """Process uploaded file (CSV or Excel) with validation and encoding handling.
+
+    With a source, its import profile (dialect, dtypes, column mapping) is
+    reused when it still reads the file's header, and refreshed from the file.
+    """
+    from services.import_profile_service import ImportProfileService
+
+    file_name = getattr(file, 'name', file if isinstance(file, (str, os.PathLike)) else None)
+    profiles = ImportProfileService.get_profiles(source) if source else []
+    profile = ImportProfileService.profile_for(profiles, file_name)
+    dialect, dtype = None, None
     if file_type == 'csv':
-        df, success, message = read_csv_file(file)
+        matched, dialect, dtype = ImportProfileService.match_dialect(profiles, file, file_name)
+        profile = matched or profile
+        if dialect is None:
+            dialect = sniff_file_dialect(file)
+        header = read_csv_header(file, dialect)
+        mapping = column_mapping or ImportProfileService.mapping_for(profile, header)
+        dtype = {**(dtype or {}), **schema_read_dtypes(header, mapping)}
+        df, success, message = read_csv_file(file, dialect, dtype)
     else:  # xlsx or xls
         df, success, message = read_excel_file(file)
-        
+
     if not success:
         return pd.DataFrame(), False, message
-    
+
+    column_mapping = column_mapping or ImportProfileService.mapping_for(profile, df.columns)
+    header = [str(column) for column in df.columns]
+    dtypes = ImportProfileService.learn_dtypes(df)
+
     # Apply column mapping if provided
     if column_mapping:
         try:
             df = df.rename(columns=column_mapping)
         except Exception as e:
             return pd.DataFrame(), False, f"Error applying column mapping: {str(e)}"
-    
+
+    if source:
+        ImportProfileService.save_profile(
+            source, header, dialect.to_dict() if dialect else None, dtypes, column_mapping, file_name
+        )
+
     return df, True, "File processed successfully"
 
 def generate_fusion_code(article_code: str, prefix: str = None) -> str:
@@ -145,24 +458,50 @@ def generate_fusion_code(article_code: str, prefix: str = None) -> str:
     combined = f"{prefix.lower()}_{article_code}".encode('utf-8')
     return hashlib.md5(combined).hexdigest()[:12]
 
+# Arrow-backed text: one contiguous buffer per column instead of a Python object per cell
+STRING_DTYPE = pd.StringDtype('pyarrow') if pa is not None else pd.StringDtype('python')
+
+# Canonical catalog feed fields: dtype once standardised, whether missing values
+# are kept (else the parser turns them into 0), and the parser for raw text
+CATALOG_FEED_SCHEMA = {
+    'article_code': {'dtype': STRING_DTYPE, 'nullable': True, 'parser': None},
+    'barcode': {'dtype': STRING_DTYPE, 'nullable': True, 'parser': None},
+    'name': {'dtype': STRING_DTYPE, 'nullable': True, 'parser': None},
+    'description': {'dtype': STRING_DTYPE, 'nullable': True, 'parser': None},
+    'price': {'dtype': 'float64', 'nullable': False, 'parser': clean_price_series},
+    'purchase_price': {'dtype': 'float64', 'nullable': False, 'parser': clean_price_series},
+    'eco_value': {'dtype': 'float64', 'nullable': False, 'parser': clean_price_series},
+    'stock_quantity': {'dtype': 'int64', 'nullable': False, 'parser': clean_quantity_series}
+}
+
+def schema_read_dtypes(header: List[str], column_mapping: Optional[Dict[str, str]] = None,
+                       normalise=None) -> Dict[str, object]:
+    """read_csv dtypes for the columns of header that map to canonical fields.
+
+    They are all read as Arrow strings: codes keep their leading zeros and
+    the parsers get raw text, so nothing is inferred as object first. When
+    the mapping is keyed on normalised names, normalise converts header
+    names to match.
+    """
+    column_mapping = column_mapping or {}
+    dtypes = {}
+    for column in header:
+        key = normalise(column) if normalise else column
+        if column_mapping.get(key, key) in CATALOG_FEED_SCHEMA:
+            dtypes[column] = STRING_DTYPE
+    return dtypes
+
 def standardize_catalog_data(df: pd.DataFrame) -> pd.DataFrame:
-    """Standardize catalog data format"""
-    # Convert string columns
-    string_columns = ['article_code', 'barcode', 'name', 'description']
-    for col in string_columns:
-        if col in df.columns:
-            df[col] = df[col].astype(str)
-    
-    # Convert and clean numeric columns
-    if 'price' in df.columns:
-        df['price'] = df['price'].apply(clean_price)
-    if 'purchase_price' in df.columns:
-        df['purchase_price'] = df['purchase_price'].apply(clean_price)
-    if 'eco_value' in df.columns:
-        df['eco_value'] = df['eco_value'].apply(clean_price)
-    if 'stock_quantity' in df.columns:
-        df['stock_quantity'] = df['stock_quantity'].apply(clean_quantity)
-    
+    """Standardize catalog data format to CATALOG_FEED_SCHEMA"""
+    for field, spec in CATALOG_FEED_SCHEMA.items():
+        if field not in df.columns:
+            continue
+        if spec['parser'] is not None:
+            df[field] = spec['parser'](df[field])
+        elif df[field].dtype != spec['dtype']:
+            # Columns read with the schema dtypes are already in place
+            df[field] = df[field].astype(spec['dtype'])
+
     return df
 
 def get_example_csv_content() -> str:
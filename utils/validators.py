@@ -1,4 +1,6 @@
 import re
+import numpy as np
+import pandas as pd
 
 def validate_ean13(barcode: str) -> bool:
     """Validate EAN-13 barcode"""
@@ -13,6 +15,16 @@ def validate_ean13(barcode: str) -> bool:
     check_digit = (10 - (total % 10)) % 10
     return check_digit == int(barcode[-1])
 
+def validate_ean13_series(barcodes: pd.Series) -> pd.Series:
+    """Validate a column of EAN-13 barcodes at once, like validate_ean13"""
+    values = barcodes.astype('string')
+    valid = values.str.fullmatch(r'[0-9]{13}').fillna(False).astype(bool)
+    if valid.any():
+        digits = np.frombuffer(''.join(values[valid]).encode('ascii'), dtype=np.uint8).reshape(-1, 13) - ord('0')
+        total = digits[:, :12].astype(np.int64) @ np.tile([1, 3], 6)
+        valid[valid] = (10 - total % 10) % 10 == digits[:, 12]
+    return valid
+
 def validate_article_code(code: str) -> bool:
     """Validate article code format"""
     return bool(re.match(r'^[A-Za-z0-9\-_]{1,50}$', code))